@@ -5,6 +5,22 @@ from jobs.models import Job
 User = get_user_model()
 
 
+class ApplicationQuerySet(models.QuerySet):
+    def received_by(self, recruiter):
+        """Applications to a recruiter's jobs, newest first, with the columns the dashboard shows"""
+        return (
+            self.filter(job__posted_by=recruiter)
+            .select_related('job', 'user', 'user__profile')
+            .only(
+                'status', 'applied_date',
+                'job__title', 'job__company_name',
+                'user__username', 'user__email',
+                'user__profile__full_name',
+            )
+            .order_by('-applied_date', '-pk')
+        )
+
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -21,9 +37,17 @@ class Application(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     notes = models.TextField(blank=True, help_text="HR notes (not visible to applicant)")
     
+    objects = ApplicationQuerySet.as_manager()
+    
     class Meta:
         unique_together = ('user', 'job')
         ordering = ['-applied_date']
+        indexes = [
+            # my_applications: a seeker's applications, newest first
+            models.Index(fields=['user', '-applied_date'], name='app_user_recent_idx'),
+            # hr_applications: applications to a recruiter's jobs, newest first
+            models.Index(fields=['job', '-applied_date'], name='app_job_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.job.title}"
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.synthetic import SyntheticData
+
+from .models import Application
+from .views import APPLICATIONS_PER_PAGE
+
+
+User = get_user_model()
+
+class HRApplicationsQueryCountTests(TestCase):
+    """The HR dashboard makes the same number of queries however many applications a recruiter has"""
+
+    @classmethod
+    def setUpTestData(cls):
+        data = SyntheticData(seed=0)
+        cls.quiet_recruiter, cls.busy_recruiter = data.create_users(2, 'hr')
+        seeker_ids = data.create_users(APPLICATIONS_PER_PAGE * 3, 'seeker')
+        # Half the applicants have no profile, which the page shows differently
+        data.create_profiles(seeker_ids[::2])
+        quiet_job, = data.create_jobs(1, [cls.quiet_recruiter])
+        busy_jobs = data.create_jobs(3, [cls.busy_recruiter])
+        Application.objects.bulk_create(
+            [Application(user_id=seeker_ids[0], job_id=quiet_job, cover_letter='Hello')] +
+            [Application(user_id=user_id, job_id=job_id, cover_letter='Hello')
+             for user_id in seeker_ids for job_id in busy_jobs]
+        )
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_is_constant(self):
+        url = reverse('hr_applications')
+        self.client.force_login(User.objects.get(pk=self.quiet_recruiter))
+        with CaptureQueriesContext(connection) as one_application:
+            self.get(url)
+        self.client.force_login(User.objects.get(pk=self.busy_recruiter))
+        for page in ('1', 'last'):
+            with self.subTest(page=page), self.assertNumQueries(len(one_application)):
+                self.get(f'{url}?page={page}')
@@ -1,11 +1,15 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
 from .models import Application
 from .forms import ApplicationForm, ApplicationStatusForm
 from jobs.models import Job
 
 
+APPLICATIONS_PER_PAGE = 20
+
+
 @login_required
 def apply_job(request, job_id):
     """Apply for a job"""
@@ -81,11 +85,14 @@ def hr_applications(request):
         messages.error(request, 'Only HR/Recruiters can view this page.')
         return redirect('home')
     
-    # Get all jobs posted by this HR
-    jobs = Job.objects.filter(posted_by=request.user)
-    applications = Application.objects.filter(job__in=jobs).order_by('-applied_date')
+    # One joined query per page, however many applications there are
+    paginator = Paginator(Application.objects.received_by(request.user), APPLICATIONS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
-    return render(request, 'applications/hr_applications.html', {'applications': applications})
+    return render(request, 'applications/hr_applications.html', {
+        'applications': page_obj.object_list,
+        'page_obj': page_obj,
+    })
 
 
 
@@ -0,0 +1,11 @@
+"""
+Gunicorn configuration
+The app is loaded in the master and the fake job detector warmed up there,
+so forked workers share its memory instead of each loading it on first use.
+"""
+preload_app = True
+
+
+def when_ready(server):
+    from jobs.ml_model import warm_up
+    warm_up()
@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'jobs.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,7 +75,7 @@ ROOT_URLCONF = 'job_recomm.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'jobs.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -107,6 +108,48 @@ DATABASES = {
 
 
 
+# Cache
+# Recommendation lists and engine revisions live here; use a shared backend
+# (database, Redis, Memcached) when running more than one worker process.
+
+# Shared by every process: the web processes, verify_jobs_worker and the
+# management commands announce catalog changes through it. The database
+# cache needs `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'django_cache'),
+    }
+}
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.db.DatabaseCache':
+    # Room for a cached recommendation list per active seeker
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 100000}
+
+# Recommendations
+RECOMMENDATION_LIMIT = 100  # ranked jobs kept per seeker
+RECOMMENDATION_CACHE_TIMEOUT = 60 * 60
+RECOMMENDATION_ENGINE_TTL = 5 * 60
+RECOMMENDATION_PRECOMPUTE_MAX_AGE = 2 * 24 * 60 * 60  # oldest precomputed rows served
+# Application-history factors trained by `manage.py train_recommender`
+RECOMMENDATION_CF_REGISTRY_DIR = BASE_DIR / 'jobs' / 'cf_models'
+# Job text TF-IDF matrix written by `manage.py build_content_index`
+RECOMMENDATION_CONTENT_INDEX_PATH = BASE_DIR / 'jobs' / 'content_index.npz'
+SIMILAR_JOBS_LIMIT = 10  # neighbours kept per job by `manage.py build_similar_jobs`
+
+# Fake job detection
+# When async, new and edited jobs wait for `manage.py verify_jobs_worker`
+JOB_VERIFICATION_ASYNC = os.environ.get('JOB_VERIFICATION_ASYNC', 'True') == 'True'
+JOB_PREDICTION_CACHE_SIZE = 10000  # predictions kept in each process
+JOB_PREDICTION_CACHE_TIMEOUT = 24 * 60 * 60  # in the shared cache
+JOB_MODEL_CHECK_INTERVAL = 30  # seconds between checks for a newly published model
+JOB_DUPLICATE_THRESHOLD = 0.8  # estimated text similarity at which a posting counts as a repost
+JOB_DUPLICATE_VERDICT_THRESHOLD = 0.95  # similarity at which a repost by the same recruiter keeps the earlier verdict
+
+# Performance instrumentation
+# Adds Server-Timing headers and per-URL histograms, served to staff at /performance/
+PERFORMANCE_INSTRUMENTATION = os.environ.get('PERFORMANCE_INSTRUMENTATION', 'False') == 'True'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -5,6 +5,9 @@ class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
 
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+
 
 
 
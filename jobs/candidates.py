@@ -0,0 +1,310 @@
+"""
+Candidate ranking for recruiters
+The reverse of recommendations: scores job seekers against one job with
+the same matching rules, from a sparse profile x skill matrix plus
+compact experience and location arrays, so ranking a job's applicants
+(or the whole pool of seekers) is one sparse mat-vec.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from applications.models import Application
+from users.models import UserProfile
+
+from .matching import (
+    EXPERIENCE_LEVELS, EXPERIENCE_WEIGHT, LOCATION_WEIGHT, SKILL_WEIGHT,
+    candidate_pool_changes, candidate_pool_position, location_matches, matching_experience_level,
+)
+
+
+# Levels some seeker can match; no amount of experience matches Executive
+MATCHED_LEVELS = {matching_experience_level(years) for years in range(7)}
+
+
+def max_score(job, skill_count):
+    """The score of a seeker matching every rule of a job with `skill_count` skills"""
+    score = skill_count * SKILL_WEIGHT
+    if job.experience_level in MATCHED_LEVELS:
+        score += EXPERIENCE_WEIGHT
+    if job.location:
+        score += LOCATION_WEIGHT
+    return score
+
+
+class CandidatePool:
+    """Scores every job seeker profile against a job at once"""
+
+    def __init__(self, user_ids, skill_ids, skill_matrix, experience_codes, location_ids, locations):
+        self.user_ids = user_ids                # int64, sorted, one per row
+        self.skill_ids = skill_ids              # int64, sorted, one per column
+        self.skill_matrix = skill_matrix        # CSR, rows=profiles, cols=skills, 0/1
+        self.experience_codes = experience_codes  # int8 index of the level each seeker matches
+        self.location_ids = location_ids        # int32 index into locations
+        self.locations = locations              # distinct lowercased profile locations
+        self.position = None
+        self.built_at = None
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def build(cls, profiles=None):
+        """Build the pool from every job seeker profile, or from a UserProfile queryset"""
+        import numpy as np
+        from scipy import sparse
+
+        rows = list(
+            (UserProfile.objects.all() if profiles is None else profiles)
+            .order_by('user_id').values_list('pk', 'user_id', 'experience_years', 'location')
+        )
+        user_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+
+        level_codes = {level: code for code, level in enumerate(EXPERIENCE_LEVELS)}
+        experience_codes = np.fromiter(
+            (level_codes[matching_experience_level(row[2])] for row in rows), dtype=np.int8, count=len(rows)
+        )
+
+        location_index = {}
+        location_ids = np.fromiter(
+            (location_index.setdefault(row[3].lower(), len(location_index)) for row in rows),
+            dtype=np.int32, count=len(rows),
+        )
+        locations = list(location_index)
+
+        through = UserProfile.skill_set.through
+        links = through.objects.all()
+        if profiles is not None:
+            links = links.filter(userprofile_id__in=[row[0] for row in rows])
+        links = np.array(list(links.values_list('userprofile_id', 'skill_id')), dtype=np.int64).reshape(-1, 2)
+
+        # Map profile ids to rows, dropping links to profiles created in between
+        profile_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        sorter = np.argsort(profile_ids)
+        positions = np.searchsorted(profile_ids, links[:, 0], sorter=sorter)
+        positions = np.minimum(positions, max(len(profile_ids) - 1, 0))
+        found = profile_ids[sorter[positions]] == links[:, 0] if len(rows) else np.zeros(len(links), bool)
+        links = links[found]
+        link_rows = sorter[positions[found]]
+
+        skill_ids, link_cols = np.unique(links[:, 1], return_inverse=True)
+        skill_matrix = sparse.csr_matrix(
+            (np.ones(len(links), dtype=np.int32), (link_rows, link_cols.ravel())),
+            shape=(len(user_ids), len(skill_ids)),
+        )
+        skill_matrix.sum_duplicates()
+        skill_matrix.data[:] = 1
+
+        return cls(user_ids, skill_ids, skill_matrix, experience_codes, location_ids, locations)
+
+    def patched(self, user_ids):
+        """A copy with the rows of `user_ids` re-read from the database
+
+        Rows of deleted profiles are dropped and the others replaced, so the
+        cost grows with the changed profiles plus a pass over the arrays.
+        """
+        import numpy as np
+        from .scoring import stack_location_rows, stack_skill_rows
+
+        user_ids = np.fromiter(user_ids, dtype=np.int64)
+        fresh = CandidatePool.build(UserProfile.objects.filter(user_id__in=user_ids.tolist()))
+        keep = ~np.isin(self.user_ids, user_ids)
+
+        skill_ids, skill_matrix = stack_skill_rows(
+            (self.skill_matrix[keep], self.skill_ids), (fresh.skill_matrix, fresh.skill_ids),
+        )
+        locations, location_ids = stack_location_rows(
+            (self.location_ids[keep], self.locations), (fresh.location_ids, fresh.locations),
+        )
+        ids = np.concatenate([self.user_ids[keep], fresh.user_ids])
+        order = np.argsort(ids, kind='stable')
+        return CandidatePool(
+            ids[order], skill_ids, skill_matrix[order],
+            np.concatenate([self.experience_codes[keep], fresh.experience_codes])[order],
+            location_ids[order], locations,
+        )
+
+    def rows_for(self, user_ids):
+        """Pool row of each user id, -1 for users without a profile"""
+        import numpy as np
+
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if not len(self.user_ids):
+            return np.full(len(user_ids), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.user_ids, user_ids), len(self.user_ids) - 1)
+        return np.where(self.user_ids[rows] == user_ids, rows, -1)
+
+    def score(self, skill_ids, experience_level, location):
+        """Return an int32 score per profile row for a job's skills, level and location"""
+        import numpy as np
+
+        vector = np.zeros(len(self.skill_ids), dtype=np.int32)
+        skill_ids = np.asarray(list(skill_ids), dtype=np.int64)
+        if len(self.skill_ids) and len(skill_ids):
+            columns = np.minimum(np.searchsorted(self.skill_ids, skill_ids), len(self.skill_ids) - 1)
+            vector[columns[self.skill_ids[columns] == skill_ids]] = 1
+        scores = self.skill_matrix @ vector
+        scores *= SKILL_WEIGHT
+
+        if experience_level in EXPERIENCE_LEVELS:
+            level = EXPERIENCE_LEVELS.index(experience_level)
+            scores += (self.experience_codes == level) * EXPERIENCE_WEIGHT
+
+        if location and self.locations:
+            matches = np.fromiter(
+                (location_matches(seeker_location, location) for seeker_location in self.locations),
+                dtype=bool, count=len(self.locations),
+            )
+            scores += matches[self.location_ids] * LOCATION_WEIGHT
+
+        return scores.astype(np.int32, copy=False)
+
+    def score_job(self, job):
+        """Score a Job against every profile"""
+        return self.score(job.skills.values_list('pk', flat=True), job.experience_level, job.location)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_candidate_pool():
+    """Return this process's pool, brought up to date with the profiles
+
+    Logged profile changes are patched in; the pool is only rebuilt when
+    every profile changed, the log has a gap, or it is older than
+    RECOMMENDATION_ENGINE_TTL.
+    """
+    global _pool
+    position = candidate_pool_position()
+    ttl = getattr(settings, 'RECOMMENDATION_ENGINE_TTL', 300)
+
+    pool = _pool
+    if pool is not None and pool.position == position and time.monotonic() - pool.built_at < ttl:
+        return pool
+
+    with _pool_lock:
+        pool = _pool
+        if pool is None or time.monotonic() - pool.built_at >= ttl:
+            changed = None
+        elif pool.position[0] != position[0] or pool.position[1] < position[1]:
+            changed = candidate_pool_changes(pool.position, position)
+        else:
+            # Another thread caught up while this one waited
+            return pool
+        if changed is None:
+            pool = CandidatePool.build()
+            pool.built_at = time.monotonic()
+        else:
+            built_at = pool.built_at
+            pool = pool.patched(changed)
+            pool.built_at = built_at
+        pool.position = position
+        _pool = pool
+    return pool
+
+
+class RankedApplicants:
+    """A job's applications, best fit first, sliceable so Paginator can page them
+
+    Ties go to the most recent application. Only the requested page of
+    applications is loaded from the database.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self._ranked = None
+
+    def _load(self):
+        import numpy as np
+
+        if self._ranked is not None:
+            return
+        pool = get_candidate_pool()
+        applications = list(
+            Application.objects.filter(job=self.job).order_by('-applied_date', '-pk').values_list('pk', 'user_id')
+        )
+        application_ids = np.fromiter((row[0] for row in applications), dtype=np.int64, count=len(applications))
+        rows = pool.rows_for([row[1] for row in applications])
+
+        # Applicants without a profile score 0
+        skill_ids = list(self.job.skills.values_list('pk', flat=True))
+        scores = np.zeros(len(applications), dtype=np.int32)
+        if len(pool):
+            job_scores = pool.score(skill_ids, self.job.experience_level, self.job.location)
+            scores = np.where(rows >= 0, job_scores[rows], 0)
+
+        # Stable sort keeps the newest first among equal scores
+        order = np.argsort(-scores, kind='stable')
+        self._ranked = list(zip(application_ids[order].tolist(), scores[order].tolist()))
+        self._max_score = max_score(self.job, len(skill_ids)) or 1
+
+    def count(self):
+        self._load()
+        return len(self._ranked)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('RankedApplicants only support contiguous slices')
+        self._load()
+        ranked = self._ranked[index]
+        applications = Application.objects.received_by(self.job.posted_by_id).in_bulk([pk for pk, _ in ranked])
+        return [
+            (applications[pk], min(int(score / self._max_score * 100), 100))
+            for pk, score in ranked
+            if pk in applications
+        ]
+
+
+class RankedSeekers:
+    """Every job seeker with a positive score for a job, best fit first, sliceable for Paginator
+
+    Yields profiles with only the fields a recruiter may see of someone
+    who has not applied: skills, experience and location.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self._scores = None
+
+    def _load(self):
+        import numpy as np
+
+        if self._scores is not None:
+            return
+        self._pool = get_candidate_pool()
+        skill_ids = list(self.job.skills.values_list('pk', flat=True))
+        self._scores = self._pool.score(skill_ids, self.job.experience_level, self.job.location)
+        self._count = int(np.count_nonzero(self._scores > 0))
+        self._max_score = max_score(self.job, len(skill_ids)) or 1
+
+    def count(self):
+        self._load()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('RankedSeekers only support contiguous slices')
+        from .scoring import top_k
+
+        self._load()
+        start, stop, _ = index.indices(self._count)
+        rows = top_k(self._scores, max(stop - start, 0), offset=start)
+        user_ids = self._pool.user_ids[rows].tolist()
+        # Seekers who have not applied are shown without their name or contact details
+        profiles = (
+            UserProfile.objects.only('user_id', 'skills', 'experience_years', 'location')
+            .in_bulk(user_ids, field_name='user_id')
+        )
+        return [
+            (profiles[user_id], min(int(score / self._max_score * 100), 100))
+            for user_id, score in zip(user_ids, self._scores[rows].tolist())
+            if user_id in profiles
+        ]
@@ -0,0 +1,19 @@
+from django.core.checks import Warning, register
+
+from .matching import cache_is_shared
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Catalog and profile revisions must reach every process through the default cache"""
+    if cache_is_shared():
+        return []
+    return [
+        Warning(
+            'The default cache is local to each process.',
+            hint='Changes made by verify_jobs_worker, reverify_jobs, train_recommender and build_content_index '
+                 'will not reach the web processes, and jobs are verified during the request. Set '
+                 'CACHE_BACKEND to a shared backend such as DatabaseCache or RedisCache.',
+            id='jobs.W001',
+        )
+    ]
@@ -0,0 +1,227 @@
+"""
+Collaborative filtering from application history
+Applications form an implicit user x job feedback matrix. The trainer
+reads them in primary-key chunks into compact id arrays, factorizes the
+binary matrix with a truncated SVD and publishes float32 user and job
+factors to their own model registry. A seeker's affinity for every job is
+then one small dense mat-vec; affinities are scaled to the seeker's best
+job and added to the rule-based scores as up to COLLABORATIVE_WEIGHT
+points, so jobs that similar seekers applied to can surface without a
+shared skill. Seekers and jobs the model has not seen get no bonus.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from applications.models import Application
+
+from .matching import COLLABORATIVE_WEIGHT
+from .model_registry import ModelRegistry
+
+
+def application_chunks(chunk_size=100000):
+    """Yield (user ids, job ids) int64 arrays for every application, in pk order"""
+    last = 0
+    while True:
+        rows = list(
+            Application.objects.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', 'user_id', 'job_id')[:chunk_size]
+        )
+        if not rows:
+            return
+        last = rows[-1][0]
+        rows = np.array(rows, dtype=np.int64)
+        yield rows[:, 1], rows[:, 2]
+
+
+def is_held_out(user_ids, job_ids, holdout_percent):
+    """Stable per-(user, job) hold-out mask"""
+    mixed = (user_ids * 2654435761 + job_ids * 40503) % 1000003
+    return mixed % 100 < holdout_percent
+
+
+def interaction_matrix(user_ids, job_ids):
+    """Binary CSR matrix of the pairs, with the sorted distinct user and job ids of its rows and columns"""
+    from scipy import sparse
+
+    users, rows = np.unique(user_ids, return_inverse=True)
+    jobs, cols = np.unique(job_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows.ravel(), cols.ravel())),
+        shape=(len(users), len(jobs)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, users, jobs
+
+
+def factorize(matrix, factors):
+    """Truncated SVD; returns float32 (user factors, job factors) whose dot products rebuild the matrix"""
+    from scipy.sparse.linalg import svds
+
+    k = min(factors, min(matrix.shape) - 1)
+    if k < 1:
+        raise ValueError('Need at least two seekers and two jobs with applications')
+    u, s, vt = svds(matrix, k=k, random_state=0)
+    root = np.sqrt(s)
+    return (u * root).astype(np.float32), (vt.T * root).astype(np.float32)
+
+
+def recall_at(user_factors, job_factors, matrix, held_out, n=20, sample=1000):
+    """Recall@n on held-out (user row, job column) pairs, for the model and for a most-applied baseline"""
+    held_out = held_out[np.argsort(held_out[:, 0], kind='stable')]
+    users, starts = np.unique(held_out[:, 0], return_index=True)
+    ends = np.append(starts[1:], len(held_out))
+    popularity = np.asarray(matrix.sum(axis=0), dtype=np.float32).ravel()
+    n = min(n, matrix.shape[1] - 1)
+
+    hits = {'model': 0, 'baseline': 0}
+    total = 0
+    for user, start, end in list(zip(users.tolist(), starts.tolist(), ends.tolist()))[:sample]:
+        expected = set(held_out[start:end, 1].tolist())
+        seen = matrix.indices[matrix.indptr[user]:matrix.indptr[user + 1]]
+        for name, scores in (('model', job_factors @ user_factors[user]), ('baseline', popularity.copy())):
+            scores[seen] = -np.inf
+            hits[name] += len(expected.intersection(np.argpartition(-scores, n)[:n].tolist()))
+        total += len(expected)
+    if not total:
+        return 0.0, 0.0
+    return hits['model'] / total, hits['baseline'] / total
+
+
+def train(chunk_size=100000, factors=32, holdout_percent=0, progress=None):
+    """Factorize the application history; returns (artifacts, report)
+
+    Only the user and job ids are kept while reading, 16 bytes per
+    application, so tens of millions of rows fit in a few hundred MB.
+    """
+    started = time.perf_counter()
+    user_chunks, job_chunks = [], []
+    read = 0
+    for user_ids, job_ids in application_chunks(chunk_size):
+        user_chunks.append(user_ids)
+        job_chunks.append(job_ids)
+        read += len(user_ids)
+        if progress:
+            progress(f'{read} applications read')
+    if not read:
+        raise ValueError('There are no applications to train on')
+    user_ids, job_ids = np.concatenate(user_chunks), np.concatenate(job_chunks)
+    del user_chunks, job_chunks
+
+    held = is_held_out(user_ids, job_ids, holdout_percent) if holdout_percent else np.zeros(len(user_ids), bool)
+    matrix, users, jobs = interaction_matrix(user_ids[~held], job_ids[~held])
+    read_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    user_factors, job_factors = factorize(matrix, factors)
+    factorize_seconds = time.perf_counter() - started
+
+    report = {
+        'applications': read,
+        'seekers': len(users),
+        'jobs': len(jobs),
+        'factors': user_factors.shape[1],
+        'read_seconds': round(read_seconds, 3),
+        'factorize_seconds': round(factorize_seconds, 3),
+    }
+    if held.any():
+        # Held-out pairs whose seeker and job both made it into the matrix
+        user_rows = np.searchsorted(users, user_ids[held])
+        job_cols = np.searchsorted(jobs, job_ids[held])
+        known = (
+            (user_rows < len(users)) & (job_cols < len(jobs))
+            & (users[np.minimum(user_rows, len(users) - 1)] == user_ids[held])
+            & (jobs[np.minimum(job_cols, len(jobs) - 1)] == job_ids[held])
+        )
+        recall, baseline = recall_at(user_factors, job_factors, matrix,
+                                     np.column_stack([user_rows[known], job_cols[known]]))
+        report['holdout'] = {'pairs': int(known.sum()), 'recall_at_20': recall, 'popularity_recall_at_20': baseline}
+
+    artifacts = {
+        'user_ids': users,
+        'job_ids': jobs,
+        'user_factors': user_factors,
+        'job_factors': job_factors,
+    }
+    return artifacts, report
+
+
+class CollaborativeModel:
+    """Trained factors; user_ids and job_ids are sorted and index the factor rows"""
+
+    def __init__(self, version, user_ids, job_ids, user_factors, job_factors):
+        self.version = version
+        self.user_ids = user_ids
+        self.job_ids = job_ids
+        self.user_factors = user_factors
+        self.job_factors = job_factors
+        self._aligned = (None, None)
+
+    def aligned_job_factors(self, job_ids):
+        """Job factors in the order of `job_ids`, zero for unknown jobs; cached for the last array seen"""
+        source, factors = self._aligned
+        if source is not job_ids:
+            factors = np.zeros((len(job_ids), self.job_factors.shape[1]), dtype=np.float32)
+            if len(self.job_ids):
+                cols = np.minimum(np.searchsorted(self.job_ids, job_ids), len(self.job_ids) - 1)
+                known = self.job_ids[cols] == job_ids
+                factors[known] = self.job_factors[cols[known]]
+            self._aligned = (job_ids, factors)
+        return factors
+
+    def bonus(self, user_id, job_ids):
+        """int32 points per job in `job_ids` for a seeker, or None if the seeker is unknown"""
+        row = int(np.searchsorted(self.user_ids, user_id))
+        if row >= len(self.user_ids) or self.user_ids[row] != user_id:
+            return None
+        affinities = self.aligned_job_factors(job_ids) @ self.user_factors[row]
+        best = affinities.max() if len(affinities) else 0
+        if best <= 0:
+            return None
+        return np.rint(np.clip(affinities / best, 0, 1) * COLLABORATIVE_WEIGHT).astype(np.int32)
+
+
+class CollaborativeFilter:
+    """The live CollaborativeModel, picking up newly published versions like the fake job detector"""
+
+    def __init__(self):
+        self.registry = ModelRegistry(getattr(settings, 'RECOMMENDATION_CF_REGISTRY_DIR',
+                                              os.path.join(settings.BASE_DIR, 'jobs', 'cf_models')))
+        self._model = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+
+    def model(self):
+        """Return the live model, or None before one is trained"""
+        if time.monotonic() < self._next_check:
+            return self._model
+        with self._lock:
+            if time.monotonic() >= self._next_check:
+                version = self.registry.current_version()
+                if version and (self._model is None or self._model.version != version):
+                    try:
+                        artifacts = self.registry.load(version)
+                        self._model = CollaborativeModel(version, **artifacts)
+                    except Exception:
+                        # Keep serving the version already loaded
+                        pass
+                self._next_check = time.monotonic() + getattr(settings, 'JOB_MODEL_CHECK_INTERVAL', 30)
+        return self._model
+
+    def version(self):
+        model = self.model()
+        return model.version if model else None
+
+    def bonus(self, user_id, job_ids):
+        model = self.model()
+        return model.bonus(user_id, job_ids) if model else None
+
+    def publish(self, artifacts, metadata=None, activate=True):
+        return self.registry.publish(artifacts, metadata=metadata, activate=activate)
+
+
+collaborative = CollaborativeFilter()
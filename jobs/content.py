@@ -0,0 +1,320 @@
+"""
+Content similarity between seekers and jobs
+Each active job's title, description, requirements and skills are
+hashed into a fixed TF-IDF space and kept as L2-normalized sparse rows,
+so a seeker's skills and bio are scored against every job with one
+sparse product. Tokens split letters from digits, so "Python3" matches
+"python", and skills named only in a description still count.
+
+`manage.py build_content_index` builds the matrix and saves it to
+RECOMMENDATION_CONTENT_INDEX_PATH. Each process loads the file and, when
+the catalog changes, appends rows for jobs edited since the index was
+built, at most FOLD_IN_LIMIT per request and by one thread at a time;
+a job's latest row wins. Verdicts do not change the text, so jobs are
+indexed whatever their verification state. IDF weights stay those of
+the last full build. Similarities are scaled to the
+seeker's best job and added to the rule-based scores as up to
+CONTENT_WEIGHT points.
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .matching import CONTENT_WEIGHT, catalog_revision
+from .models import Job
+
+
+N_FEATURES = 2 ** 18
+TOKEN_PATTERN = r'[a-z]+|\d+'
+TEXT_FIELDS = ('title', 'description', 'requirements', 'skills_required')
+# Edited jobs vectorized at most per call of get_content_index
+FOLD_IN_LIMIT = 1000
+
+
+def content_index_path():
+    return getattr(settings, 'RECOMMENDATION_CONTENT_INDEX_PATH',
+                   os.path.join(settings.BASE_DIR, 'jobs', 'content_index.npz'))
+
+
+def build_vectorizer():
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(n_features=N_FEATURES, token_pattern=TOKEN_PATTERN, stop_words='english',
+                             alternate_sign=False, norm=None, dtype=np.float32)
+
+
+def term_frequencies(vectorizer, texts):
+    """Sublinear (1 + log) term frequencies, one CSR row per text"""
+    tf = vectorizer.transform(texts).tocsr()
+    tf.sum_duplicates()
+    np.log(tf.data, out=tf.data)
+    tf.data += 1
+    return tf
+
+
+def tfidf_rows(tf, idf):
+    """Weight term frequencies by idf and L2-normalize each row, in place"""
+    from sklearn.preprocessing import normalize
+
+    tf.data *= idf[tf.indices]
+    return normalize(tf, copy=False)
+
+
+def job_texts(jobs):
+    """Yield (job id, text) for a queryset, in id order"""
+    for row in jobs.order_by('pk').values_list('pk', *TEXT_FIELDS).iterator(chunk_size=5000):
+        yield row[0], ' '.join(row[1:])
+
+
+def job_text(job):
+    return ' '.join(getattr(job, field) for field in TEXT_FIELDS)
+
+
+def indexed_jobs():
+    return Job.objects.filter(is_active=True)
+
+
+def recommendable_jobs():
+    return indexed_jobs().filter(is_verified=True)
+
+
+class ContentIndex:
+    """TF-IDF rows of job text, in column-major blocks so a query only reads the postings of its terms"""
+
+    def __init__(self, blocks, idf, built_at, after_id=0):
+        self.blocks = blocks      # [(int64 job ids, CSC float32 rows)], later blocks supersede earlier ones
+        self.idf = idf            # float32 per hashed term, from the last full build
+        self.built_at = built_at  # aware datetime; jobs edited after it are not in the index yet,
+        self.after_id = after_id  # nor those edited at it with a greater id
+        self.caught_up = True
+        self.job_ids = np.concatenate([job_ids for job_ids, _ in blocks]) if blocks else np.zeros(0, np.int64)
+        self._aligned = (None, None)
+        self._sorted = None
+        self._vectorizer = build_vectorizer()
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    @classmethod
+    def build(cls, jobs=None, chunk_size=20000, progress=None):
+        """Vectorize every active job, fitting idf over them"""
+        built_at = timezone.now()
+        jobs = indexed_jobs() if jobs is None else jobs
+        return cls.from_texts(job_texts(jobs), built_at, chunk_size, progress)
+
+    @classmethod
+    def from_texts(cls, rows, built_at, chunk_size=20000, progress=None):
+        """Build from (job id, text) pairs"""
+        vectorizer = build_vectorizer()
+        document_frequency = np.zeros(N_FEATURES, dtype=np.int64)
+        chunks, job_ids = [], []
+        batch_ids, batch_texts = [], []
+
+        def flush():
+            tf = term_frequencies(vectorizer, batch_texts)
+            document_frequency[:] += np.bincount(tf.indices, minlength=N_FEATURES)
+            chunks.append(tf)
+            job_ids.extend(batch_ids)
+            batch_ids.clear()
+            batch_texts.clear()
+            if progress:
+                progress(f'{len(job_ids)} jobs vectorized')
+
+        for job_id, text in rows:
+            batch_ids.append(job_id)
+            batch_texts.append(text)
+            if len(batch_ids) >= chunk_size:
+                flush()
+        if batch_ids:
+            flush()
+
+        # Smoothed idf, as TfidfVectorizer(smooth_idf=True)
+        idf = (np.log((1 + len(job_ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        if not chunks:
+            return cls([], idf, built_at)
+        matrix = tfidf_rows(sparse.vstack(chunks, format='csr'), idf)
+        return cls([(np.asarray(job_ids, dtype=np.int64), matrix.tocsc())], idf, built_at)
+
+    def updated(self, limit=FOLD_IN_LIMIT):
+        """Return an index that includes up to `limit` jobs edited since this one was built
+
+        Jobs are taken in (updated_date, id) order, so repeated calls
+        catch up with any number of edits; `caught_up` is False while
+        more remain. A limit of None folds in every edited job.
+
+        Edited jobs go into a single second block, which keeps only the
+        latest row of each job.
+        """
+        edited = indexed_jobs().filter(
+            Q(updated_date__gt=self.built_at) | Q(updated_date=self.built_at, pk__gt=self.after_id)
+        ).order_by('updated_date', 'pk').values_list('pk', 'updated_date', *TEXT_FIELDS)
+        rows = list(edited if limit is None else edited[:limit])
+        if not rows:
+            self.caught_up = True
+            return self
+
+        job_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        matrix = tfidf_rows(term_frequencies(self._vectorizer, [' '.join(row[2:]) for row in rows]), self.idf)
+        base, edited = self.blocks[:1], self.blocks[1:]
+        if edited:
+            previous_ids, previous = edited[0]
+            keep = ~np.isin(previous_ids, job_ids)
+            job_ids = np.concatenate([previous_ids[keep], job_ids])
+            matrix = sparse.vstack([previous.tocsr()[keep], matrix], format='csr')
+        index = ContentIndex(base + [(job_ids, matrix.tocsc())], self.idf, rows[-1][1], rows[-1][0])
+        index.caught_up = limit is None or len(rows) < limit
+        return index
+
+    def save(self, path):
+        """Write the index as one .npz, replacing any previous file atomically"""
+        job_ids = self.job_ids
+        matrix = sparse.vstack([block for _, block in self.blocks], format='csr') if self.blocks else (
+            sparse.csr_matrix((0, N_FEATURES), dtype=np.float32))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.content-index-', suffix='.npz', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, job_ids=job_ids, indptr=matrix.indptr, indices=matrix.indices, data=matrix.data,
+                         idf=self.idf, built_at=np.float64(self.built_at.timestamp()),
+                         after_id=np.int64(self.after_id))
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as stored:
+            job_ids = stored['job_ids']
+            matrix = sparse.csr_matrix(
+                (stored['data'], stored['indices'], stored['indptr']), shape=(len(job_ids), N_FEATURES),
+            )
+            built_at = datetime.fromtimestamp(float(stored['built_at']), tz=dt_timezone.utc)
+            after_id = int(stored['after_id']) if 'after_id' in stored.files else 0
+            return cls([(job_ids, matrix.tocsc())], stored['idf'], built_at, after_id)
+
+    def query_vector(self, text, min_idf=0):
+        """The TF-IDF vector of a seeker's text, as (term indices, weights)
+
+        Terms with idf below `min_idf` are dropped after normalizing.
+        """
+        query = tfidf_rows(term_frequencies(self._vectorizer, [text]), self.idf)
+        keep = self.idf[query.indices] >= min_idf
+        return query.indices[keep], query.data[keep]
+
+    def similarities(self, text, min_idf=0):
+        """Cosine similarity of `text` to every row, in row order"""
+        terms, weights = self.query_vector(text, min_idf)
+        if not len(terms):
+            return np.zeros(len(self.job_ids), dtype=np.float32)
+        return np.concatenate([block[:, terms] @ weights for _, block in self.blocks]).astype(np.float32)
+
+    def sorted_rows(self):
+        """Rows ordered by job id, and the sorted ids; computed once per index
+
+        The sort is stable, so the last row of each job is its latest.
+        """
+        if self._sorted is None:
+            order = np.argsort(self.job_ids, kind='stable')
+            self._sorted = (order, self.job_ids[order])
+        return self._sorted
+
+    def latest_rows(self, job_ids):
+        """Latest row of each job id, -1 for jobs not in the index"""
+        rows = np.full(len(job_ids), -1, dtype=np.int64)
+        if len(self.job_ids):
+            order, sorted_ids = self.sorted_rows()
+            last = np.searchsorted(sorted_ids, job_ids, side='right') - 1
+            found = (last >= 0) & (sorted_ids[np.maximum(last, 0)] == job_ids)
+            rows[found] = order[last[found]]
+        return rows
+
+    def superseded(self):
+        """Mask of rows replaced by a later row of the same job"""
+        mask = np.zeros(len(self.job_ids), dtype=bool)
+        if len(self.job_ids):
+            order, sorted_ids = self.sorted_rows()
+            mask[order] = np.append(sorted_ids[1:] == sorted_ids[:-1], False)
+        return mask
+
+    def rows_for(self, job_ids):
+        """latest_rows, cached for the last array seen"""
+        source, rows = self._aligned
+        if source is not job_ids:
+            rows = self.latest_rows(job_ids)
+            self._aligned = (job_ids, rows)
+        return rows
+
+    def bonus(self, text, job_ids):
+        """int32 points per job in `job_ids` for a seeker's text, or None if nothing is similar"""
+        if not text or not text.strip() or not len(self.job_ids):
+            return None
+        rows = self.rows_for(job_ids)
+        similarities = self.similarities(text)
+        scores = np.where(rows >= 0, similarities[np.maximum(rows, 0)], 0)
+        best = scores.max() if len(scores) else 0
+        if best <= 0:
+            return None
+        return np.rint(np.clip(scores / best, 0, 1) * CONTENT_WEIGHT).astype(np.int32)
+
+
+_index = None
+_index_state = (None, None, 0)  # (catalog revision, file mtime, next check)
+_index_lock = threading.Lock()
+
+
+def get_content_index():
+    """Return this process's content index, or None before one is built
+
+    The file is reloaded when it is rebuilt, and jobs edited since are
+    folded in whenever the catalog revision changes, FOLD_IN_LIMIT at a
+    time until caught up. Only one thread does so; the others keep
+    using the index as it is meanwhile.
+    """
+    global _index, _index_state
+    revision = catalog_revision()
+    checked_revision, mtime, next_check = _index_state
+    if revision == checked_revision and time.monotonic() < next_check:
+        return _index
+
+    if not _index_lock.acquire(blocking=False):
+        return _index
+    try:
+        checked_revision, mtime, next_check = _index_state
+        if revision != checked_revision or time.monotonic() >= next_check:
+            path = content_index_path()
+            try:
+                current_mtime = os.path.getmtime(path)
+            except OSError:
+                current_mtime = None
+            index = _index
+            try:
+                if current_mtime is None:
+                    index = None
+                elif current_mtime != mtime or index is None:
+                    index = ContentIndex.load(path).updated()
+                elif revision != checked_revision or not index.caught_up:
+                    index = index.updated()
+            except (OSError, ValueError, KeyError):
+                # Keep serving the index already loaded
+                pass
+            _index = index
+            if index is not None and not index.caught_up:
+                next_check = 0
+            else:
+                next_check = time.monotonic() + getattr(settings, 'JOB_MODEL_CHECK_INTERVAL', 30)
+            _index_state = (revision, current_mtime, next_check)
+    finally:
+        _index_lock.release()
+    return _index
@@ -0,0 +1,207 @@
+"""
+Near-duplicate job postings
+A posting's title, description and requirements are cut into overlapping
+word shingles and summarised by a MinHash signature of NUM_PERM values;
+the share of values two signatures agree on estimates the Jaccard
+similarity of their shingles. Signatures are split into BANDS bands whose
+hashes are indexed in JobBand, so only postings sharing a band, the likely
+near-duplicates, are fetched and compared, with one indexed query however
+large the catalog. With 16 bands of 8 rows, pairs at 0.8 similarity are
+found 95% of the time and pairs below 0.5 almost never.
+
+Each fingerprint points at the earliest near-duplicate posted by the same
+recruiter with the same company, location, type and level, the fields
+job_list filters on: job_list shows that posting only, so a filtered
+listing never hides a repost behind a copy it leaves out. A repost also
+keeps the verdict already reached for a near-exact copy by the same
+recruiter and company, at any location, instead of going through the
+fake job detector.
+"""
+import functools
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Job, JobBand, JobFingerprint
+
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+FINGERPRINT_FIELDS = ('title', 'description', 'requirements')
+# Only near-duplicates that agree on these are collapsed into one listing
+GROUP_FIELDS = ('posted_by_id', 'company_name', 'location', 'job_type', 'experience_level')
+# Postings compared at most, should one band be very common
+MAX_CANDIDATES = 500
+
+# Hash functions (a * x + b) mod p over 32-bit shingle hashes
+_PRIME = 4294967291  # largest prime below 2 ** 32
+
+
+@functools.lru_cache(maxsize=None)
+def hash_parameters():
+    """(a, b) of the NUM_PERM hash functions, as uint64 columns"""
+    import numpy as np
+
+    random = np.random.RandomState(20251018)
+    a = random.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)[:, np.newaxis]
+    b = random.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)[:, np.newaxis]
+    return a, b
+
+
+def duplicate_threshold():
+    return getattr(settings, 'JOB_DUPLICATE_THRESHOLD', 0.8)
+
+
+def verdict_threshold():
+    return getattr(settings, 'JOB_DUPLICATE_VERDICT_THRESHOLD', 0.95)
+
+
+def posting_text(job):
+    return ' '.join(getattr(job, field) for field in FINGERPRINT_FIELDS)
+
+
+def group_key(values):
+    """Comparable GROUP_FIELDS values, ignoring case and surrounding spaces"""
+    return tuple(value.strip().lower() if isinstance(value, str) else value for value in values)
+
+
+def job_group(job):
+    return group_key(getattr(job, field) for field in GROUP_FIELDS)
+
+
+def shingles(text):
+    """crc32 of each distinct run of SHINGLE_SIZE words, as uint64"""
+    import numpy as np
+
+    words = re.findall(r'\w+', text.lower())
+    runs = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    runs.discard('')
+    return np.fromiter((zlib.crc32(run.encode()) for run in runs), dtype=np.uint64, count=len(runs))
+
+
+def signature(text):
+    """MinHash signature of a text as NUM_PERM uint32, empty for text without words"""
+    import numpy as np
+
+    hashes = shingles(text)
+    if not len(hashes):
+        return np.zeros(0, dtype=np.uint32)
+    a, b = hash_parameters()
+    return ((a * hashes + b) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """One signed 64-bit bucket per band, hashing the band number with its values"""
+    if not len(signature):
+        return []
+    values = signature.astype('<u4')
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + values[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            'big', signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def pack(signature):
+    return signature.astype('<u4').tobytes()
+
+
+def unpack(stored):
+    import numpy as np
+
+    return np.frombuffer(bytes(stored), dtype='<u4')
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    import numpy as np
+
+    if not len(a) or len(a) != len(b):
+        return 0.0
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def without_duplicates(jobs):
+    """Leave out postings whose earliest copy is still listed"""
+    return jobs.filter(Q(fingerprint__duplicate_of__isnull=True) | Q(fingerprint__duplicate_of__is_active=False))
+
+
+class Fingerprint:
+    """A posting's signature and the indexed postings it nearly duplicates"""
+
+    def __init__(self, job):
+        self.signature = signature(posting_text(job))
+        self.buckets = band_buckets(self.signature)
+        self.group = job_group(job)
+        # [(job id, earliest copy id, similarity, group)], most similar first
+        self.duplicates = self.find(job.pk)
+
+    def find(self, exclude=None):
+        if not self.buckets:
+            return []
+        candidates = JobFingerprint.objects.filter(job__lsh_bands__bucket__in=self.buckets)
+        if exclude is not None:
+            candidates = candidates.exclude(pk=exclude)
+        threshold = duplicate_threshold()
+        found = []
+        fields = ('job_id', 'signature', 'duplicate_of_id', *(f'job__{field}' for field in GROUP_FIELDS))
+        for job_id, stored, original_id, *group in candidates.values_list(*fields).distinct()[:MAX_CANDIDATES]:
+            score = similarity(self.signature, unpack(stored))
+            if score >= threshold:
+                found.append((job_id, original_id or job_id, score, group_key(group)))
+        found.sort(key=lambda duplicate: -duplicate[2])
+        return found
+
+    def original_id(self, pk):
+        """The earliest posting of this one's group it copies, or None if it came first"""
+        earliest = min(
+            (original_id for _, original_id, _, group in self.duplicates if group == self.group), default=None,
+        )
+        if earliest is None or (pk is not None and earliest >= pk):
+            return None
+        return earliest
+
+    def scored_duplicate(self, job):
+        """The most similar near-exact copy by the same recruiter and company that has a verdict, or None"""
+        threshold = verdict_threshold()
+        ids = [job_id for job_id, _, score, _ in self.duplicates if score >= threshold]
+        if not ids:
+            return None
+        scored = {
+            duplicate.pk: duplicate
+            for duplicate in Job.objects.filter(pk__in=ids, posted_by_id=job.posted_by_id,
+                                                company_name__iexact=job.company_name)
+            .exclude(verification_status=Job.VERIFICATION_PENDING)
+            .only('is_verified', 'ml_confidence', 'verification_status')
+        }
+        return next((scored[job_id] for job_id in ids if job_id in scored), None)
+
+    def save(self, job):
+        """Index a saved posting
+
+        Reposts of it left in another group by an edit are listed again.
+        """
+        with transaction.atomic():
+            JobFingerprint.objects.update_or_create(
+                job=job, defaults={'signature': pack(self.signature), 'duplicate_of_id': self.original_id(job.pk)},
+            )
+            reposts = {
+                job_id: group
+                for job_id, *group in JobFingerprint.objects.filter(duplicate_of=job)
+                .values_list('job_id', *(f'job__{field}' for field in GROUP_FIELDS))
+            }
+            moved = [job_id for job_id, group in reposts.items() if group_key(group) != self.group]
+            if moved:
+                JobFingerprint.objects.filter(job_id__in=moved).update(duplicate_of=None)
+            JobBand.objects.filter(job=job).delete()
+            JobBand.objects.bulk_create(
+                [JobBand(job=job, band=band, bucket=bucket) for band, bucket in enumerate(self.buckets)]
+            )
@@ -0,0 +1,114 @@
+"""
+Array-backed random forest inference
+Flattens a fitted RandomForestClassifier into contiguous NumPy node
+arrays and evaluates them directly on sparse TF-IDF rows, walking every
+tree of every sample one level per step. This avoids the per-call input
+validation and per-estimator dispatch of predict_proba, which dominate
+when scoring a single posting. The arrays pickle as plain ndarrays, so a
+forest stored in the model registry can be memory-mapped.
+"""
+import numpy as np
+from scipy import sparse
+
+
+class FlatForest:
+    """A random forest as flat node arrays; predict_proba matches sklearn's"""
+
+    def __init__(self, classes, n_features, roots, feature, threshold, left, right, value):
+        self.classes = classes        # class labels, as model.classes_
+        self.n_features = n_features
+        self.roots = roots            # int64, index of each tree's root node
+        self.feature = feature        # int64 per node, -1 for leaves
+        self.threshold = threshold    # float64 per node; go left when x <= threshold
+        self.left = left              # int64 per node, global node index, -1 for leaves
+        self.right = right
+        self.value = value            # float64 (nodes, classes), normalized leaf probabilities
+
+    def __len__(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_estimator(cls, forest):
+        """Flatten a fitted RandomForestClassifier (single output)"""
+        estimators = getattr(forest, 'estimators_', None)
+        if not estimators or getattr(forest, 'n_outputs_', 1) != 1:
+            raise TypeError('Expected a fitted single-output tree ensemble classifier')
+
+        roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            features.append(np.where(is_leaf, -1, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, -1, tree.children_left + offset))
+            rights.append(np.where(is_leaf, -1, tree.children_right + offset))
+
+            # As DecisionTreeClassifier.predict_proba normalizes leaf values
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            offset += tree.node_count
+
+        return cls(
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_,
+            roots=np.asarray(roots, dtype=np.int64),
+            feature=np.concatenate(features).astype(np.int64),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int64),
+            right=np.concatenate(rights).astype(np.int64),
+            value=np.ascontiguousarray(np.concatenate(values)),
+        )
+
+    def apply(self, X):
+        """Return the leaf reached in each tree, shape (samples, trees)"""
+        # sklearn casts inputs to float32 before comparing with thresholds
+        X = sparse.csr_matrix(X, dtype=np.float32)
+        X.sort_indices()
+        n_samples = X.shape[0]
+
+        # Nonzeros keyed by sample * n_features + feature, sorted, with a
+        # sentinel so lookups past the end find nothing
+        rows = np.repeat(np.arange(n_samples, dtype=np.int64), np.diff(X.indptr))
+        keys = np.append(rows * self.n_features + X.indices, n_samples * self.n_features)
+        data = np.append(X.data, np.float32(0))
+
+        n_trees = len(self.roots)
+        nodes = np.tile(self.roots, n_samples)
+        offsets = np.repeat(np.arange(n_samples, dtype=np.int64) * self.n_features, n_trees)
+        # Only (sample, tree) pairs still at an internal node are stepped
+        active = np.arange(len(nodes))
+        while len(active):
+            current = nodes[active]
+            feature = self.feature[current]
+            internal = feature >= 0
+            active, current, feature = active[internal], current[internal], feature[internal]
+            lookup = offsets[active] + feature
+            positions = np.searchsorted(keys, lookup)
+            x = np.where(keys[positions] == lookup, data[positions], np.float32(0))
+            nodes[active] = np.where(x <= self.threshold[current], self.left[current], self.right[current])
+        return nodes.reshape(n_samples, n_trees)
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over the trees, as RandomForestClassifier"""
+        leaves = self.value[self.apply(X)]
+        # cumsum adds the trees strictly in order, as sklearn accumulates them,
+        # so the result is bit-for-bit the same
+        proba = np.cumsum(leaves, axis=1)[:, -1]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes[self.predict_proba(X).argmax(axis=1)]
+
+
+def export_forest(model):
+    """Return a FlatForest for a tree ensemble, or None for other models"""
+    try:
+        return FlatForest.from_estimator(model)
+    except (TypeError, AttributeError):
+        return None
@@ -0,0 +1,220 @@
+"""
+Per-request performance instrumentation
+While a request (or any block wrapped in `record`) runs, an execute
+wrapper on every database connection counts queries and their time, the
+template backend times rendering, and `timer` blocks time named sections
+such as fake job detection. Totals are sent back as a Server-Timing header
+and added to in-process histograms tagged by URL name, which staff can
+read from the performance_metrics view. Querysets evaluated inside a
+template count towards both the db and template timers.
+
+Everything is off unless settings.PERFORMANCE_INSTRUMENTATION is set: the
+middleware then removes itself, and `timer` costs one context variable
+lookup.
+"""
+import bisect
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+
+# Histogram bucket upper bounds (milliseconds, or queries); the last bucket is open
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+_current = ContextVar('performance_metrics', default=None)
+
+
+def instrumentation_enabled():
+    return getattr(settings, 'PERFORMANCE_INSTRUMENTATION', False)
+
+
+class RequestMetrics:
+    """Totals for one request: wall time, queries and named timers, in seconds"""
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.queries = 0
+        self.timers = {'db': 0.0, 'template': 0.0}
+
+    def add(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper counting queries and their time"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.timers['db'] += time.perf_counter() - started
+
+    def server_timing(self):
+        """Server-Timing header value; durations in milliseconds"""
+        entries = [f'total;dur={self.wall * 1000:.1f}']
+        for name, seconds in self.timers.items():
+            description = f';desc="{self.queries} queries"' if name == 'db' else ''
+            entries.append(f'{name};dur={seconds * 1000:.1f}{description}')
+        return ', '.join(entries)
+
+
+class timer:
+    """Add the time spent in a block to the current request's `name` timer"""
+
+    __slots__ = ('name', 'metrics', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.metrics = _current.get()
+        if self.metrics is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.metrics is not None:
+            self.metrics.add(self.name, time.perf_counter() - self.started)
+
+
+class record:
+    """Instrument a block as one request tagged `tag` and add it to the histograms
+
+    Works outside the request cycle too, e.g. around a management command's
+    unit of work. Records nothing when instrumentation is disabled.
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.metrics = None
+
+    def __enter__(self):
+        if not instrumentation_enabled():
+            return None
+        self.metrics = RequestMetrics(self.tag)
+        self._token = _current.set(self.metrics)
+        self._wrappers = ExitStack()
+        for connection in connections.all():
+            self._wrappers.enter_context(connection.execute_wrapper(self.metrics))
+        return self.metrics
+
+    def __exit__(self, *exc_info):
+        if self.metrics is None:
+            return
+        self._wrappers.close()
+        _current.reset(self._token)
+        self.metrics.wall = time.perf_counter() - self.metrics.started
+        histograms.add(self.metrics)
+
+
+class Histogram:
+    """Counts of observations per bucket, with their sum and maximum"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, value_ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, value_ms)] += 1
+        self.total += value_ms
+        self.maximum = max(self.maximum, value_ms)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations"""
+        target = fraction * sum(self.counts)
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + (None,), self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound if bound is not None else self.maximum
+        return 0
+
+    def as_dict(self):
+        count = sum(self.counts)
+        return {
+            'count': count,
+            'mean': round(self.total / count, 3) if count else 0.0,
+            'max': round(self.maximum, 3),
+            'p50_le': self.percentile(0.5),
+            'p99_le': self.percentile(0.99),
+            'buckets': {
+                f'le_{bound}' if bound is not None else 'inf': count
+                for bound, count in zip(BUCKETS_MS + (None,), self.counts)
+            },
+        }
+
+
+class Histograms:
+    """Per-tag histograms of wall time, each timer and query counts, for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tags = {}
+        self.started = time.time()
+
+    def add(self, metrics):
+        values = {'total_ms': metrics.wall * 1000, 'queries': metrics.queries}
+        values.update((f'{name}_ms', seconds * 1000) for name, seconds in metrics.timers.items())
+        with self._lock:
+            histograms = self._tags.setdefault(metrics.tag, {})
+            for name, value in values.items():
+                if name not in histograms:
+                    histograms[name] = Histogram()
+                histograms[name].add(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                tag: {name: histogram.as_dict() for name, histogram in sorted(metrics.items())}
+                for tag, metrics in sorted(self._tags.items())
+            }
+
+    def clear(self):
+        with self._lock:
+            self._tags.clear()
+            self.started = time.time()
+
+
+histograms = Histograms()
+
+
+class PerformanceMiddleware:
+    """Instrument each request and tag it with its URL name"""
+
+    def __init__(self, get_response):
+        if not instrumentation_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record('unresolved') as metrics:
+            response = self.get_response(request)
+            # The URL is only resolved once the view has run
+            if request.resolver_match is not None:
+                metrics.tag = request.resolver_match.view_name
+        response['Server-Timing'] = metrics.server_timing()
+        return response
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return super().render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose templates add their render time to the 'template' timer"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,111 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from jobs.duplicates import (
+    FINGERPRINT_FIELDS, GROUP_FIELDS, band_buckets, duplicate_threshold, group_key, pack, signature, similarity, unpack,
+)
+from jobs.models import Job, JobBand, JobFingerprint
+
+
+# Values bound per IN (...) lookup, within SQLite's parameter limit
+LOOKUP_BATCH = 900
+
+
+def batches(values, size=LOOKUP_BATCH):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class Command(BaseCommand):
+    help = 'Fingerprint every job for near-duplicate detection and link reposts to their earliest copy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Jobs fingerprinted at a time')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        threshold = duplicate_threshold()
+        started = time.perf_counter()
+        indexed = duplicates = 0
+        last = 0
+        while True:
+            rows = list(
+                Job.objects.filter(pk__gt=last).order_by('pk')
+                .values_list('pk', *FINGERPRINT_FIELDS, *GROUP_FIELDS)[:options['chunk_size']]
+            )
+            if not rows:
+                break
+            last = rows[-1][0]
+            chunk_started = time.perf_counter()
+            texts = len(FINGERPRINT_FIELDS) + 1
+            signatures = {row[0]: signature(' '.join(row[1:texts])) for row in rows}
+            groups = {row[0]: group_key(row[texts:]) for row in rows}
+            buckets = {job_id: band_buckets(values) for job_id, values in signatures.items()}
+            with transaction.atomic():
+                JobFingerprint.objects.filter(job_id__in=list(signatures)).delete()
+                JobBand.objects.filter(job_id__in=list(signatures)).delete()
+                JobFingerprint.objects.bulk_create(
+                    [JobFingerprint(job_id=job_id, signature=pack(values)) for job_id, values in signatures.items()],
+                    batch_size=500,
+                )
+                JobBand.objects.bulk_create(
+                    [JobBand(job_id=job_id, band=band, bucket=bucket)
+                     for job_id, job_buckets in buckets.items() for band, bucket in enumerate(job_buckets)],
+                    batch_size=2000,
+                )
+                originals = self._link_duplicates(signatures, groups, buckets, threshold)
+                JobFingerprint.objects.bulk_update(
+                    [JobFingerprint(job_id=job_id, duplicate_of_id=original_id)
+                     for job_id, original_id in originals.items()],
+                    ['duplicate_of'], batch_size=500,
+                )
+            indexed += len(rows)
+            duplicates += len(originals)
+            self.stdout.write(
+                f'Jobs {rows[0][0]}-{last}: {len(rows)} fingerprinted, {len(originals)} reposts, '
+                f'in {(time.perf_counter() - chunk_started) * 1000:.0f} ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fingerprinted {indexed} jobs in {time.perf_counter() - started:.1f}s; '
+            f'{duplicates} are reposts of an earlier posting'
+        ))
+
+    def _link_duplicates(self, signatures, groups, buckets, threshold):
+        """{job id: earliest copy id} for the chunk's jobs that repeat an earlier posting of their group
+
+        Jobs are taken in id order, so every earlier job, in this chunk or
+        a previous one, is already fingerprinted and linked.
+        """
+        sharing = {}
+        for values in batches({bucket for job_buckets in buckets.values() for bucket in job_buckets}):
+            for bucket, job_id in JobBand.objects.filter(bucket__in=values).values_list('bucket', 'job_id'):
+                sharing.setdefault(bucket, set()).add(job_id)
+
+        candidates = {job_id: {other for bucket in job_buckets for other in sharing.get(bucket, ()) if other < job_id}
+                      for job_id, job_buckets in buckets.items()}
+        earlier = {}
+        for ids in batches({other for others in candidates.values() for other in others} - set(signatures)):
+            for job_id, stored, original_id, *group in (
+                JobFingerprint.objects.filter(job_id__in=ids)
+                .values_list('job_id', 'signature', 'duplicate_of_id', *(f'job__{field}' for field in GROUP_FIELDS))
+            ):
+                earlier[job_id] = (unpack(stored), original_id or job_id, group_key(group))
+
+        originals = {}
+        for job_id in sorted(signatures):
+            roots = []
+            for other in candidates[job_id]:
+                if other in signatures:
+                    other_signature, root, group = signatures[other], originals.get(other, other), groups[other]
+                else:
+                    other_signature, root, group = earlier[other]
+                if group == groups[job_id] and similarity(signatures[job_id], other_signature) >= threshold:
+                    roots.append(root)
+            if roots:
+                originals[job_id] = min(roots)
+        return originals
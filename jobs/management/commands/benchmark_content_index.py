@@ -0,0 +1,80 @@
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from jobs.content import ContentIndex
+from jobs.synthetic import ROLES, SyntheticData
+
+
+def synthetic_postings(data, count):
+    """(id, text) pairs shaped like seed_synthetic's jobs, without touching the database"""
+    for job_id in range(1, count + 1):
+        names = data.sample_skills(1, 8)
+        role = data.random.choice(ROLES)
+        yield job_id, (
+            f'{role} We are hiring a {role} to join a growing team. You will work with {", ".join(names[:3])} '
+            f'and collaborate with product, design and engineering. {data.random.randint(0, 8)}+ years of '
+            f'experience. Knowledge of {", ".join(names)}. {", ".join(names)}'
+        )
+
+
+def synthetic_seekers(data, count):
+    for _ in range(count):
+        names = data.sample_skills(2, 10)
+        yield f'{", ".join(names)} {data.random.choice(ROLES)} who enjoys building things with {names[0]}.'
+
+
+class Command(BaseCommand):
+    help = 'Time building, saving, loading and querying the content index on synthetic job text'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=100000, help='Synthetic jobs to index (e.g. 1000000)')
+        parser.add_argument('--queries', type=int, default=200, help='Seeker texts to score')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['jobs'] < 1 or options['queries'] < 1:
+            raise CommandError('--jobs and --queries must be positive')
+        data = SyntheticData(seed=options['seed'])
+
+        started = time.perf_counter()
+        index = ContentIndex.from_texts(synthetic_postings(data, options['jobs']), timezone.now())
+        build_seconds = time.perf_counter() - started
+        matrix = index.blocks[0][1]
+        size_mb = (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 2 ** 20
+        self.stdout.write(
+            f'Built {len(index)} jobs in {build_seconds:.1f}s '
+            f'({build_seconds / len(index) * 100000:.1f}s per 100k jobs), '
+            f'{matrix.nnz} nonzeros, {size_mb:.0f} MB'
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'content_index.npz')
+            started = time.perf_counter()
+            index.save(path)
+            save_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            index = ContentIndex.load(path)
+            load_seconds = time.perf_counter() - started
+        self.stdout.write(f'Saved in {save_seconds:.1f}s, loaded in {load_seconds:.1f}s')
+
+        job_ids = index.job_ids
+        started = time.perf_counter()
+        index.rows_for(job_ids)
+        self.stdout.write(f'Aligned to the engine\'s job order in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+        timings = []
+        for text in synthetic_seekers(data, options['queries']):
+            started = time.perf_counter()
+            index.bonus(text, job_ids)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {len(timings)} seekers: p50 {statistics.median(timings) * 1000:.1f} ms, '
+            f'p99 {p99 * 1000:.1f} ms'
+        ))
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.forest import FlatForest
+from jobs.ml_model import detector
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Check the flattened forest against sklearn's predict_proba and time single-posting inference"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=500, help='Number of jobs to check and time')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the sampled jobs')
+
+    def handle(self, *args, **options):
+        model, vectorizer = detector.estimator(), detector.vectorizer
+        try:
+            forest = FlatForest.from_estimator(model)
+        except TypeError as e:
+            raise CommandError(f'The live model ({type(model).__name__}) is not a forest: {e}')
+
+        texts = [
+            f'{title} {description} {requirements} {company_name}'
+            for title, description, requirements, company_name in
+            Job.objects.values_list('title', 'description', 'requirements', 'company_name')[:options['jobs']]
+        ]
+        if not texts:
+            raise CommandError('No jobs to benchmark; post some jobs or run seed_synthetic first')
+        X = vectorizer.transform(texts)
+        self.stdout.write(f'Model version {detector.version}: {len(forest)} trees, {X.shape[1]} features')
+
+        expected = model.predict_proba(X)
+        actual = forest.predict_proba(X)
+        if not np.array_equal(expected, actual):
+            raise CommandError(
+                f'Probabilities differ from sklearn (max abs difference {np.abs(expected - actual).max():g})'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Probabilities identical for {len(texts)} postings'))
+
+        rows = [X[i] for i in range(X.shape[0])]
+        for name, predict_proba in (('sklearn predict_proba', model.predict_proba),
+                                    ('FlatForest', forest.predict_proba)):
+            predict_proba(rows[0])
+            timings = []
+            for _ in range(options['repeat']):
+                for row in rows:
+                    started = time.perf_counter()
+                    predict_proba(row)
+                    timings.append(time.perf_counter() - started)
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'{name:22} single posting: p50 {statistics.median(timings) * 1e6:8.1f} us, '
+                f'p99 {p99 * 1e6:8.1f} us'
+            )
+
+            started = time.perf_counter()
+            predict_proba(X)
+            self.stdout.write(f'{name:22} batch of {len(rows)}: {(time.perf_counter() - started) * 1000:.1f} ms')
@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.candidates import CandidatePool
+from jobs.models import Job
+from jobs.matching import score_job
+from jobs.scoring import ScoringEngine
+from users.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Check ScoringEngine and CandidatePool against the reference scoring loop and time them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=20, help='Number of profiles to sample')
+        parser.add_argument('--jobs', type=int, default=20, help='Number of jobs to rank candidates for')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        engine = ScoringEngine.build()
+        build_time = time.perf_counter() - start
+        self.stdout.write(f'Built engine for {len(engine)} jobs in {build_time * 1000:.1f} ms')
+
+        jobs = Job.objects.in_bulk(engine.job_ids.tolist())
+        ordered_jobs = [jobs[job_id] for job_id in engine.job_ids.tolist()]
+        profiles = UserProfile.objects.prefetch_related('skill_set')[:options['profiles']]
+
+        loop_time = engine_time = 0.0
+        mismatches = 0
+        for profile in profiles:
+            user_skills = set(profile.get_skills_list())
+            user_location = profile.location.lower() if profile.location else ''
+
+            start = time.perf_counter()
+            expected = [score_job(job, user_skills, profile.experience_years, user_location)
+                        for job in ordered_jobs]
+            loop_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            scores = engine.score_profile(profile)
+            engine_time += time.perf_counter() - start
+
+            if scores.tolist() != expected:
+                mismatches += 1
+                self.stderr.write(f'Score mismatch for profile {profile.pk}')
+
+        count = max(len(profiles), 1)
+        self.stdout.write(f'Reference loop: {loop_time / count * 1000:.2f} ms per profile')
+        self.stdout.write(f'ScoringEngine:  {engine_time / count * 1000:.2f} ms per profile')
+        if mismatches:
+            raise CommandError(f'{mismatches} of {len(profiles)} profiles scored differently')
+        self.stdout.write(self.style.SUCCESS(f'Scores identical for {len(profiles)} profiles'))
+
+        self._check_candidates(options['jobs'])
+
+    def _check_candidates(self, job_count):
+        start = time.perf_counter()
+        pool = CandidatePool.build()
+        build_time = time.perf_counter() - start
+        self.stdout.write(f'Built candidate pool for {len(pool)} profiles in {build_time * 1000:.1f} ms')
+
+        profiles = UserProfile.objects.in_bulk(pool.user_ids.tolist(), field_name='user_id')
+        seekers = [
+            (set(profile.get_skills_list()), profile.experience_years,
+             profile.location.lower() if profile.location else '')
+            for profile in (profiles[user_id] for user_id in pool.user_ids.tolist())
+        ]
+        jobs = Job.objects.order_by('-posted_date')[:job_count]
+
+        loop_time = pool_time = 0.0
+        mismatches = 0
+        for job in jobs:
+            start = time.perf_counter()
+            expected = [score_job(job, *seeker) for seeker in seekers]
+            loop_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            scores = pool.score_job(job)
+            pool_time += time.perf_counter() - start
+
+            if scores.tolist() != expected:
+                mismatches += 1
+                self.stderr.write(f'Candidate score mismatch for job {job.pk}')
+
+        count = max(len(jobs), 1)
+        self.stdout.write(f'Reference loop: {loop_time / count * 1000:.2f} ms per job')
+        self.stdout.write(f'CandidatePool:  {pool_time / count * 1000:.2f} ms per job')
+        if mismatches:
+            raise CommandError(f'{mismatches} of {len(jobs)} jobs ranked candidates differently')
+        self.stdout.write(self.style.SUCCESS(f'Candidate scores identical for {len(jobs)} jobs'))
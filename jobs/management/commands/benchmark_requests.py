@@ -0,0 +1,191 @@
+import json
+import platform
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from applications.models import Application
+from jobs.ml_model import detector
+from jobs.models import Job
+from jobs.pagination import KeysetPaginator
+from jobs.recommendations import cache_key
+from jobs.synthetic import seed
+from users.models import UserProfile
+
+
+User = get_user_model()
+
+
+class QueryCounter:
+    """execute_wrapper that counts the queries run through a connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def summarize(timings, queries=None):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    summary = {
+        'runs': len(timings),
+        'p50_ms': round(statistics.median(timings) * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3),
+    }
+    if queries is not None:
+        summary['queries'] = queries
+    return summary
+
+
+class Command(BaseCommand):
+    help = ('Time the main pages and the fake job detector, with query counts and p50/p99 latency, '
+            'and write a JSON report')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='',
+                            help='Comma-separated job counts (e.g. 1000,100000,1000000). The database is topped '
+                                 'up with seed_synthetic data to each size before measuring; use a throwaway '
+                                 'database. Without it, the current data is measured.')
+        parser.add_argument('--requests', type=int, default=50, help='Timed runs per measurement')
+        parser.add_argument('--output', default='benchmark_report.json', help='Where to write the JSON report')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be positive')
+        try:
+            scales = sorted(int(scale) for scale in options['scales'].split(',') if scale.strip())
+        except ValueError:
+            raise CommandError('--scales must be a comma-separated list of job counts')
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'runs': [],
+        }
+        for scale in scales or [None]:
+            if scale is not None:
+                self._top_up(scale)
+            run = {
+                'jobs': Job.objects.count(),
+                'seekers': UserProfile.objects.count(),
+                'applications': Application.objects.count(),
+                'results': self._measure(options['requests']),
+            }
+            report['runs'].append(run)
+            self._print_run(run)
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+
+    def _top_up(self, scale):
+        """Add synthetic rows until there are `scale` jobs, with seekers and applications in proportion"""
+        missing = scale - Job.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f'Seeding {missing} jobs to reach {scale}...')
+        started = time.perf_counter()
+        seed(
+            jobs=missing,
+            seekers=max(scale // 10 - UserProfile.objects.count(), 0),
+            recruiters=max(missing // 1000, 1),
+            applications=max(scale - Application.objects.count(), 0),
+            seed=scale,
+        )
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    def _measure(self, runs):
+        seekers = list(User.objects.filter(profile__isnull=False).order_by('pk')[:runs + 1])
+        recruiter = (
+            User.objects.filter(is_hr=True)
+            .annotate(received=Count('posted_jobs__applications')).order_by('-received').first()
+        )
+        if not seekers or recruiter is None:
+            raise CommandError('Need at least one job seeker with a profile and one recruiter; run seed_synthetic')
+
+        jobs = Job.objects.filter(is_active=True)
+        deep_job = jobs.order_by('-posted_date', '-pk')[min(1000, max(jobs.count() - 1, 0)):][:1].first()
+        deep_cursor = KeysetPaginator(jobs, 20).encode_cursor(deep_job, 'next') if deep_job else ''
+
+        seeker = seekers[0]
+        pages = [
+            ('home', seeker, reverse('home')),
+            ('job_list', seeker, reverse('job_list')),
+            ('job_list (deep page)', seeker, f'{reverse("job_list")}?cursor={deep_cursor}'),
+            ('job_list (search)', seeker, f'{reverse("job_list")}?search=Python'),
+            ('job_recommendations', seeker, reverse('job_recommendations')),
+            ('hr_applications', recruiter, reverse('hr_applications')),
+        ]
+
+        client = Client(HTTP_HOST='127.0.0.1')
+        results = {}
+        for name, user, url in pages:
+            client.force_login(user)
+            results[name] = self._time_page(client, url, runs)
+
+        # Each run is a seeker with no cached recommendations
+        timings = []
+        for user in seekers[1:] or seekers:
+            cache.delete(cache_key(user.pk))
+            client.force_login(user)
+            started = time.perf_counter()
+            client.get(reverse('job_recommendations'))
+            timings.append(time.perf_counter() - started)
+        results['job_recommendations (uncached)'] = summarize(timings)
+
+        results['detector.predict (uncached)'] = self._time_predict(runs, unique=True)
+        results['detector.predict (cached)'] = self._time_predict(runs, unique=False)
+        return results
+
+    def _time_page(self, client, url, runs):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - started)
+        return summarize(timings, queries=queries.count)
+
+    def _time_predict(self, runs, unique):
+        job = Job.objects.order_by('pk').first()
+        posting = (job.title, job.description, job.requirements, job.company_name) if job else (
+            'Software Engineer', 'Build web services in Python.', '3+ years of experience', 'Acme Corp')
+        detector.predict(*posting)
+
+        timings = []
+        for _ in range(runs):
+            title = f'{posting[0]} {uuid.uuid4().hex}' if unique else posting[0]
+            started = time.perf_counter()
+            detector.predict(title, *posting[1:])
+            timings.append(time.perf_counter() - started)
+        return summarize(timings)
+
+    def _print_run(self, run):
+        self.stdout.write(
+            f'\n{run["jobs"]} jobs, {run["seekers"]} seekers, {run["applications"]} applications'
+        )
+        for name, result in run['results'].items():
+            queries = f'{result["queries"]:3d} queries' if 'queries' in result else ' ' * 11
+            self.stdout.write(
+                f'  {name:32} {queries}  p50 {result["p50_ms"]:9.2f} ms  p99 {result["p99_ms"]:9.2f} ms'
+            )
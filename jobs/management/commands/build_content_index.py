@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.content import ContentIndex, content_index_path
+from jobs.recommendations import invalidate_all_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Build the TF-IDF matrix of job text used for content similarity in recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Jobs vectorized at a time')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Add jobs edited since the saved index was built instead of rebuilding it')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        path = content_index_path()
+        progress = self.stdout.write if options['verbosity'] > 1 else None
+
+        started = time.perf_counter()
+        if options['incremental']:
+            try:
+                previous = ContentIndex.load(path)
+            except OSError:
+                raise CommandError(f'No content index at {path}; build one without --incremental first')
+            index = previous.updated(limit=None)
+            action = f'Added {len(index) - len(previous)} edited jobs to'
+        else:
+            index = ContentIndex.build(chunk_size=options['chunk_size'], progress=progress)
+            action = f'Built from {len(index)} jobs:'
+        index.save(path)
+        elapsed = time.perf_counter() - started
+
+        if not options['incremental']:
+            # New idf weights change every similarity
+            invalidate_all_recommendations()
+        self.stdout.write(self.style.SUCCESS(f'{action} {path} in {elapsed:.1f}s'))
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.content import ContentIndex, content_index_path, recommendable_jobs
+from jobs.models import SimilarJob
+from jobs.similar import neighbour_lists, replace_similar_jobs, similar_jobs_limit, similarity_matrix
+
+
+_matrix = None
+_columns = None
+_job_ids = None
+
+
+def _init_worker(path):
+    """Load the shared job matrix once per worker process"""
+    global _matrix, _columns, _job_ids
+    with np.load(path) as stored:
+        _job_ids = stored['job_ids']
+        _matrix = sparse.csr_matrix((stored['data'], stored['indices'], stored['indptr']),
+                                    shape=tuple(stored['shape']))
+    _columns = _matrix.tocsc()
+
+
+def _neighbour_chunk(args):
+    start, stop, limit = args
+    started = time.perf_counter()
+    lists = neighbour_lists(_matrix, _columns, _job_ids, start, stop, limit)
+    return lists, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Precompute the most similar jobs of every active, verified job into the SimilarJob table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Jobs per worker task')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (1 runs in this process)')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        limit = similar_jobs_limit()
+        path = content_index_path()
+
+        started = time.perf_counter()
+        try:
+            index = ContentIndex.load(path).updated(limit=None)
+        except OSError:
+            raise CommandError(f'No content index at {path}; run build_content_index first')
+        listed = np.fromiter(
+            recommendable_jobs().order_by('pk').values_list('pk', flat=True).iterator(chunk_size=10000),
+            dtype=np.int64,
+        )
+        job_ids, matrix = similarity_matrix(index, listed)
+        del index
+        if len(job_ids) < len(listed):
+            self.stdout.write(self.style.WARNING(
+                f'{len(listed) - len(job_ids)} listed jobs are missing from the content index'
+            ))
+        self.stdout.write(f'Prepared {len(job_ids)} jobs, {matrix.nnz} nonzeros in {time.perf_counter() - started:.1f}s')
+
+        chunk_size = options['chunk_size']
+        chunks = ((start, min(start + chunk_size, len(job_ids)), limit)
+                  for start in range(0, len(job_ids), chunk_size))
+        computed = 0.0
+        with tempfile.TemporaryDirectory() as directory:
+            matrix_path = os.path.join(directory, 'similar-jobs.npz')
+            np.savez(matrix_path, job_ids=job_ids, data=matrix.data, indices=matrix.indices,
+                     indptr=matrix.indptr, shape=np.array(matrix.shape))
+            del matrix
+            if options['workers'] > 1:
+                # Workers import this module, and with it the models, so they
+                # are forked from a process where Django is set up
+                if 'fork' not in multiprocessing.get_all_start_methods():
+                    raise CommandError('--workers needs the fork start method on this platform; use --workers 1')
+                connections.close_all()
+                context = multiprocessing.get_context('fork')
+                with context.Pool(options['workers'], initializer=_init_worker,
+                                  initargs=(matrix_path,)) as pool:
+                    for lists, seconds in pool.imap(_neighbour_chunk, chunks):
+                        computed += seconds
+                        self._write_chunk(lists, seconds)
+            else:
+                _init_worker(matrix_path)
+                for chunk in chunks:
+                    lists, seconds = _neighbour_chunk(chunk)
+                    computed += seconds
+                    self._write_chunk(lists, seconds)
+
+        # Lists of jobs that are no longer listed
+        removed, _ = SimilarJob.objects.exclude(job__is_active=True, job__is_verified=True).delete()
+        elapsed = time.perf_counter() - started
+        per_100k = elapsed / max(1, len(job_ids)) * 100000
+        self.stdout.write(self.style.SUCCESS(
+            f'Built similar jobs for {len(job_ids)} jobs in {elapsed:.1f}s ({per_100k:.1f}s per 100k jobs, '
+            f'{computed:.1f}s of products across {max(1, options["workers"])} workers); '
+            f'removed {removed} stale rows'
+        ))
+
+    def _write_chunk(self, lists, score_time):
+        started = time.perf_counter()
+        rows = replace_similar_jobs(lists)
+        job_ids = list(lists)
+        self.stdout.write(
+            f'Jobs {job_ids[0]}-{job_ids[-1]}: {len(job_ids)} jobs, {rows} rows, '
+            f'computed in {score_time * 1000:.0f} ms, written in {(time.perf_counter() - started) * 1000:.0f} ms'
+        )
@@ -0,0 +1,76 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from applications.models import Application
+from applications.views import APPLICATIONS_PER_PAGE
+from jobs.duplicates import without_duplicates
+from jobs.models import Job, SimilarJob
+from jobs.views import SIMILAR_JOBS_SHOWN
+
+
+# Plan lines that mean a table is read in full
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!.*\bUSING\b.*\bINDEX\b)(\w+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def hot_queries():
+    """The query shapes issued on every page load of the busiest views"""
+    now = timezone.now()
+    after = Q(posted_date__lt=now) | Q(posted_date=now, pk__lt=1)
+    return {
+        'home': Job.objects.filter(is_active=True).order_by('-posted_date')[:10],
+        'job_list (first page)': (
+            without_duplicates(Job.objects.filter(is_active=True)).order_by('-posted_date', '-pk')[:21]
+        ),
+        'job_list (next page)': (
+            without_duplicates(Job.objects.filter(after, is_active=True)).order_by('-posted_date', '-pk')[:21]
+        ),
+        'job_recommendations (engine build)': (
+            Job.objects.filter(is_active=True, is_verified=True)
+            .order_by('-posted_date', '-id').values_list('id', 'posted_date', 'experience_level', 'location')
+        ),
+        'job_detail (similar jobs)': (
+            SimilarJob.objects.filter(job_id=1, similar__is_active=True, similar__is_verified=True)
+            .select_related('similar').order_by('rank')[:SIMILAR_JOBS_SHOWN]
+        ),
+        'my_jobs': (
+            Job.objects.filter(posted_by_id=1).order_by('-posted_date')
+            .annotate(application_count=Count('applications'))
+        ),
+        'my_applications': Application.objects.filter(user_id=1).order_by('-applied_date'),
+        'hr_applications': Application.objects.received_by(1)[:APPLICATIONS_PER_PAGE],
+    }
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot Job and Application queries and fail if any reads a table in full'
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'No plan check for the {connection.vendor} backend')
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables would otherwise be sequentially scanned regardless of indexes
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in hot_queries().items():
+                plan = queryset.explain()
+                scanned = pattern.findall(plan)
+                status = self.style.ERROR('FULL SCAN') if scanned else self.style.SUCCESS('indexed')
+                self.stdout.write(f'{name}: {status}')
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+                if scanned:
+                    failures.append(f'{name} ({", ".join(scanned)})')
+
+        if failures:
+            raise CommandError('Queries reading whole tables: ' + '; '.join(failures))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.model_registry import ModelRegistry, RegistryError
+
+
+class Command(BaseCommand):
+    help = 'List published fake job detector versions, or switch the live version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activate', metavar='VERSION',
+                            help='Make VERSION live; running processes switch to it within JOB_MODEL_CHECK_INTERVAL')
+
+    def handle(self, *args, **options):
+        registry = ModelRegistry()
+
+        if options['activate']:
+            try:
+                registry.load(options['activate'])
+                registry.activate(options['activate'])
+            except RegistryError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'Activated model version {options["activate"]}'))
+            return
+
+        current = registry.current_version()
+        manifests = registry.versions()
+        if not manifests:
+            self.stdout.write('No model versions published yet')
+        for manifest in manifests:
+            marker = '*' if manifest['version'] == current else ' '
+            source = manifest['metadata'].get('source', '')
+            self.stdout.write(f'{marker} {manifest["version"]}  {manifest["created_at"]}  {source}')
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import time
+from itertools import groupby
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from jobs.models import Recommendation
+from jobs.recommendations import rank_jobs, recommendation_limit, seeker_text
+from jobs.scoring import ScoringEngine
+from users.models import UserProfile
+
+
+_engine = None
+_engine_built_at = None
+
+
+def _init_worker():
+    """Build one scoring engine per worker process"""
+    global _engine, _engine_built_at
+    connections.close_all()
+    # Rows are stamped with the catalog snapshot time, so any later
+    # invalidation marks them stale
+    _engine_built_at = timezone.now()
+    _engine = ScoringEngine.build()
+
+
+def _rank_chunk(args):
+    """Score a chunk of seekers and return their Recommendation rows as tuples"""
+    user_ids, limit = args
+    started = time.perf_counter()
+    profiles = UserProfile.objects.filter(user_id__in=user_ids).values_list(
+        'pk', 'user_id', 'experience_years', 'location', 'skills', 'bio'
+    )
+    links = (
+        UserProfile.skill_set.through.objects
+        .filter(userprofile__user_id__in=user_ids)
+        .order_by('userprofile_id')
+        .values_list('userprofile_id', 'skill_id')
+    )
+    skills = {profile_id: [skill_id for _, skill_id in rows]
+              for profile_id, rows in groupby(links, key=lambda link: link[0])}
+
+    rows = []
+    for profile_id, user_id, experience_years, location, skill_names, bio in profiles:
+        ranked = rank_jobs(_engine, skills.get(profile_id, []), experience_years, location, limit,
+                           user_id, seeker_text(skill_names, bio))
+        rows.extend((user_id, job_id, rank, score) for rank, (job_id, score) in enumerate(ranked, 1))
+    return user_ids, rows, _engine_built_at, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Precompute top-N recommendations for every job seeker into the Recommendation table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Seekers per chunk')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (1 runs in this process)')
+        parser.add_argument('--after', type=int, default=0, help='Start after this user id')
+        parser.add_argument('--cursor-file', help='Resume from, and record progress to, this file')
+
+    def handle(self, *args, **options):
+        limit = recommendation_limit()
+        cursor_file = options['cursor_file']
+        after = options['after']
+        if cursor_file and os.path.exists(cursor_file):
+            with open(cursor_file) as f:
+                after = max(after, int(f.read().strip() or 0))
+        if after:
+            self.stdout.write(f'Resuming after user {after}')
+
+        chunks = (
+            (user_ids, limit)
+            for user_ids in self._user_chunks(after, options['chunk_size'])
+        )
+
+        started = time.perf_counter()
+        seekers = 0
+        if options['workers'] > 1:
+            # Workers inherit Django's settings and app registry by forking; a
+            # spawned worker could not even import this module before setup
+            if 'fork' not in multiprocessing.get_all_start_methods():
+                raise CommandError('--workers needs the fork start method on this platform; use --workers 1')
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(options['workers'], initializer=_init_worker) as pool:
+                for result in pool.imap(_rank_chunk, chunks):
+                    seekers += self._write_chunk(*result, cursor_file)
+        else:
+            _init_worker()
+            for chunk in chunks:
+                seekers += self._write_chunk(*_rank_chunk(chunk), cursor_file)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Precomputed recommendations for {seekers} seekers in {elapsed:.1f}s'
+        ))
+
+    def _user_chunks(self, after, chunk_size):
+        """Yield lists of seeker user ids in id order, using a keyset cursor"""
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+        while True:
+            user_ids = list(
+                UserProfile.objects.filter(user_id__gt=after)
+                .order_by('user_id').values_list('user_id', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                return
+            yield user_ids
+            after = user_ids[-1]
+
+    def _write_chunk(self, user_ids, rows, computed_at, score_time, cursor_file):
+        started = time.perf_counter()
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=user_ids).delete()
+            Recommendation.objects.bulk_create(
+                [Recommendation(user_id=user_id, job_id=job_id, rank=rank, score=score, computed_at=computed_at)
+                 for user_id, job_id, rank, score in rows],
+                batch_size=5000,
+            )
+        if cursor_file:
+            with open(cursor_file, 'w') as f:
+                f.write(str(user_ids[-1]))
+
+        self.stdout.write(
+            f'Users {user_ids[0]}-{user_ids[-1]}: {len(user_ids)} seekers, {len(rows)} rows, '
+            f'scored in {score_time * 1000:.0f} ms, written in {(time.perf_counter() - started) * 1000:.0f} ms'
+        )
+        return len(user_ids)
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from jobs.models import Job
+from jobs.verification import VERIFICATION_FIELDS, save_verifications, verification_finished, verify_jobs
+
+
+class Command(BaseCommand):
+    help = 'Re-score every job with the fake job detector and store the verdicts in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Jobs per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        started = time.perf_counter()
+        scored = changed = 0
+        after = 0
+        while True:
+            jobs = list(
+                Job.objects.filter(pk__gt=after).order_by('pk')
+                .only('pk', 'is_verified', 'ml_confidence', 'verification_status', *VERIFICATION_FIELDS)[:chunk_size]
+            )
+            if not jobs:
+                break
+            after = jobs[-1].pk
+
+            batch_started = time.perf_counter()
+            updated = verify_jobs(jobs)
+            if updated and not options['dry_run']:
+                with transaction.atomic():
+                    save_verifications(updated)
+            scored += len(jobs)
+            changed += len(updated)
+            self.stdout.write(
+                f'Jobs {jobs[0].pk}-{jobs[-1].pk}: {len(jobs)} scored, {len(updated)} changed '
+                f'in {(time.perf_counter() - batch_started) * 1000:.0f} ms'
+            )
+
+        if changed and not options['dry_run']:
+            verification_finished()
+
+        elapsed = time.perf_counter() - started
+        verb = 'would change' if options['dry_run'] else 'changed'
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} jobs in {elapsed:.1f}s; {verb} {changed}'))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.synthetic import seed
+
+
+class Command(BaseCommand):
+    help = 'Bulk insert synthetic recruiters, job seekers, jobs and applications for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1000)
+        parser.add_argument('--seekers', type=int, default=1000, help='Job seekers, each with a profile')
+        parser.add_argument('--recruiters', type=int, default=50)
+        parser.add_argument('--applications', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--verified-ratio', type=float, default=0.9,
+                            help='Share of jobs marked verified by the detector')
+        parser.add_argument('--password', default='password', help='Password for every synthetic user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for repeatable data')
+
+    def handle(self, *args, **options):
+        counts = {name: options[name] for name in ('jobs', 'seekers', 'recruiters', 'applications')}
+        if min(counts.values()) < 0 or options['batch_size'] < 1:
+            raise CommandError('Counts must not be negative and --batch-size must be positive')
+
+        started = time.perf_counter()
+        seed(
+            **counts,
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            verified_ratio=options['verified_ratio'],
+            progress=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {counts["jobs"]} jobs, {counts["seekers"]} seekers, {counts["recruiters"]} recruiters and '
+            f'up to {counts["applications"]} applications in {time.perf_counter() - started:.1f}s'
+        ))
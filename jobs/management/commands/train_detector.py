@@ -0,0 +1,77 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.ml_model import detector
+from jobs.training import CSVPostings, JobPostings, train
+
+
+class Command(BaseCommand):
+    help = 'Train the fake job detector on labelled postings and publish it as a new model version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', metavar='PATH',
+                            help='Train on a CSV export instead of the jobs in the database')
+        parser.add_argument('--label-column', default='fraudulent', help='CSV column holding the 0/1 label')
+        parser.add_argument('--label-meaning', choices=('fake', 'real'), default='fake',
+                            help='Whether a 1 in the label column marks a fake or a real posting')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Postings per partial_fit call')
+        parser.add_argument('--epochs', type=int, default=1, help='Passes over the training data')
+        parser.add_argument('--holdout', type=int, default=10, help='Percent of postings held out for evaluation')
+        parser.add_argument('--n-features', type=int, default=2 ** 20, help='Size of the hashed feature space')
+        parser.add_argument('--no-activate', action='store_true',
+                            help='Publish without making the new version live')
+        parser.add_argument('--dry-run', action='store_true', help='Train and evaluate without publishing')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['epochs'] < 1:
+            raise CommandError('--chunk-size and --epochs must be positive')
+        if not 0 < options['holdout'] < 100:
+            raise CommandError('--holdout must be between 1 and 99')
+
+        if options['csv']:
+            postings = CSVPostings(options['csv'], options['label_column'], options['label_meaning'])
+            source = f'csv:{options["csv"]}'
+        else:
+            postings = JobPostings()
+            source = 'jobs table'
+
+        try:
+            model, vectorizer, report = train(
+                postings,
+                chunk_size=options['chunk_size'],
+                epochs=options['epochs'],
+                holdout_percent=options['holdout'],
+                n_features=options['n_features'],
+                progress=self.stdout.write,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        holdout = report['holdout']
+        self.stdout.write(
+            f'Trained on {report["trained_postings"]} postings in {report["training_seconds"]:.1f}s '
+            f'({report["postings_per_second"]} postings/s)'
+        )
+        if holdout['postings']:
+            self.stdout.write(
+                f'Hold-out ({holdout["postings"]} postings): accuracy {holdout["accuracy"]:.3f}, '
+                f'fake precision {holdout["precision"]:.3f}, recall {holdout["recall"]:.3f}, '
+                f'F1 {holdout["f1"]:.3f}, log loss {holdout["log_loss"]:.4f}'
+            )
+        else:
+            self.stdout.write(self.style.WARNING('No postings fell in the hold-out set'))
+
+        if options['dry_run']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        version = detector.publish(
+            model, vectorizer,
+            metadata={'source': source, 'trainer': 'train_detector', **report},
+            activate=not options['no_activate'],
+        )
+        state = 'published' if options['no_activate'] else 'published and activated'
+        self.stdout.write(self.style.SUCCESS(
+            f'Model version {version} {state}; run reverify_jobs to re-score existing jobs'
+        ))
@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.collaborative import collaborative, train
+from jobs.recommendations import invalidate_all_recommendations
+
+
+class Command(BaseCommand):
+    help = ('Factorize the application history into collaborative filtering factors and publish them '
+            'as a new version blended into recommendations')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100000, help='Applications read per query')
+        parser.add_argument('--factors', type=int, default=32, help='Latent factors per seeker and job')
+        parser.add_argument('--holdout', type=int, default=0,
+                            help='Percent of applications held out to report recall@20 (0 trains on all)')
+        parser.add_argument('--no-activate', action='store_true',
+                            help='Publish without making the new version live')
+        parser.add_argument('--dry-run', action='store_true', help='Train and evaluate without publishing')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['factors'] < 1:
+            raise CommandError('--chunk-size and --factors must be positive')
+        if not 0 <= options['holdout'] < 100:
+            raise CommandError('--holdout must be between 0 and 99')
+
+        progress = self.stdout.write if options['verbosity'] > 1 else None
+        try:
+            artifacts, report = train(
+                chunk_size=options['chunk_size'],
+                factors=options['factors'],
+                holdout_percent=options['holdout'],
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'Factorized {report["applications"]} applications ({report["seekers"]} seekers x '
+            f'{report["jobs"]} jobs, {report["factors"]} factors): read in {report["read_seconds"]:.1f}s, '
+            f'factorized in {report["factorize_seconds"]:.1f}s'
+        )
+        holdout = report.get('holdout')
+        if holdout:
+            self.stdout.write(
+                f'Hold-out ({holdout["pairs"]} applications): recall@20 {holdout["recall_at_20"]:.3f}, '
+                f'most-applied baseline {holdout["popularity_recall_at_20"]:.3f}'
+            )
+
+        if options['dry_run']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        version = collaborative.publish(
+            artifacts, metadata={'trainer': 'train_recommender', **report}, activate=not options['no_activate'],
+        )
+        if options['no_activate']:
+            self.stdout.write(self.style.SUCCESS(f'Recommender version {version} published'))
+            return
+        invalidate_all_recommendations()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recommender version {version} published and activated; recommendation lists will be rescored'
+        ))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.matching import cache_is_shared
+from jobs.ml_model import warm_up
+from jobs.model_registry import RegistryError
+from jobs.verification import verify_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run the background worker that scores pending jobs with the fake job detector'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Pending jobs scored per batch')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+        if not cache_is_shared():
+            raise CommandError(
+                'The default cache is local to each process, so web processes would never see the jobs this '
+                'worker verifies. Use a shared cache (CACHE_BACKEND), such as the default DatabaseCache.'
+            )
+
+        self.stdout.write('Verification worker started')
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    warm_up()
+                    processed = verify_pending_jobs(batch_size)
+                except RegistryError as e:
+                    # Jobs stay pending until the live model loads again
+                    self.stderr.write(f'{e}; retrying in {options["interval"]:g}s')
+                    processed = 0
+                if processed:
+                    self.stdout.write(
+                        f'Verified {processed} jobs in {(time.perf_counter() - started) * 1000:.0f} ms'
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Verification worker stopped')
@@ -0,0 +1,229 @@
+"""
+Job matching rules
+Score weights and the rules that decide whether a job matches a seeker's
+skills, experience and location. Kept free of NumPy/SciPy so importing it
+(e.g. from signal handlers) stays cheap.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Job
+
+
+# Score weights
+SKILL_WEIGHT = 10
+EXPERIENCE_WEIGHT = 5
+LOCATION_WEIGHT = 3
+# Most points the collaborative filter can add, for a seeker's best job
+COLLABORATIVE_WEIGHT = 10
+# Most points the content similarity can add, for the job most like a seeker's skills and bio
+CONTENT_WEIGHT = 10
+
+EXPERIENCE_LEVELS = [level for level, _ in Job.EXPERIENCE_LEVEL_CHOICES]
+
+# Logged changes are kept this long; an engine or pool further behind is rebuilt
+CHANGE_TIMEOUT = 24 * 60 * 60
+# Change numbers looked up at once past the latest one seen
+CHANGE_PROBE = 8
+
+# Job fields that recommendations score, directly or through the content index
+SCORED_FIELDS = (
+    'is_active', 'is_verified', 'posted_date', 'experience_level', 'location',
+    'skills_required', 'title', 'description', 'requirements',
+)
+
+# Cache backends whose entries only the process that wrote them can see
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """Whether revisions bumped by one process reach the others through the default cache"""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def new_revision():
+    """A revision no process has seen, so a value evicted from the cache reads as a change, not as 0 again"""
+    return uuid.uuid4().hex
+
+
+class ChangeLog:
+    """A revision shared through the cache, with a log of the ids each change touched
+
+    Each change is logged under the next sequence number of the current
+    epoch; a change to every row starts a new epoch. Processes that keep
+    arrays built from the rows follow the log to re-read only the rows
+    that changed.
+    """
+
+    def __init__(self, name):
+        # The epoch: a new one makes every process rebuild
+        self.revision_key = f'jobs:{name}_revision'
+        # (epoch, number of its latest logged change); may lag behind the log
+        self.sequence_key = f'jobs:{name}_sequence'
+        self.name = name
+        self._position = (None, 0)  # latest (epoch, sequence) this process has seen
+
+    def change_key(self, epoch, sequence):
+        return f'jobs:{self.name}_change:{epoch}:{sequence}'
+
+    def _probe_keys(self, epoch, sequence):
+        return [self.change_key(epoch, number) for number in range(sequence + 1, sequence + 1 + CHANGE_PROBE)]
+
+    def position(self):
+        """Return (epoch, sequence); when nothing changed, this is one cache lookup"""
+        epoch, sequence = self._position
+        values = cache.get_many([self.revision_key, self.sequence_key, *self._probe_keys(epoch, sequence)])
+        current = values.get(self.revision_key)
+        if current is None:
+            current = cache.get_or_set(self.revision_key, new_revision, timeout=None)
+        hint_epoch, hint = values.get(self.sequence_key) or (None, 0)
+        if current != epoch or (hint_epoch == current and hint > sequence):
+            epoch, sequence = current, hint if hint_epoch == current else 0
+            values = cache.get_many(self._probe_keys(epoch, sequence))
+
+        while True:
+            logged = 0
+            while logged < CHANGE_PROBE and self.change_key(epoch, sequence + logged + 1) in values:
+                logged += 1
+            sequence += logged
+            if logged < CHANGE_PROBE:
+                break
+            values = cache.get_many(self._probe_keys(epoch, sequence))
+        self._position = (epoch, sequence)
+        return self._position
+
+    def bump(self, ids=None):
+        """Log a change to `ids`, or start a new epoch without"""
+        epoch, sequence = self.position() if ids is not None else (None, 0)
+        if ids is None or cache.get(self.sequence_key, (None, 0))[0] != epoch:
+            # A change to every row, or a sequence lost from the cache that
+            # other processes could number differently: start a new epoch
+            epoch = new_revision()
+            cache.set(self.sequence_key, (epoch, 0), timeout=None)
+            cache.set(self.revision_key, epoch, timeout=None)
+            return
+
+        # add() fails for numbers another process took first
+        sequence += 1
+        while not cache.add(self.change_key(epoch, sequence), list(ids), CHANGE_TIMEOUT):
+            sequence += 1
+        cache.set(self.sequence_key, (epoch, sequence), timeout=None)
+        self._position = (epoch, sequence)
+
+    def changes(self, since, position, limit=1000):
+        """Ids changed between two positions
+
+        None if a process must rebuild instead: the epoch changed, a change
+        is no longer logged, or more than `limit` changes were made.
+        """
+        (epoch, start), (current, end) = since, position
+        if epoch != current or end < start or end - start > limit:
+            return None
+        keys = [self.change_key(epoch, number) for number in range(start + 1, end + 1)]
+        logged = cache.get_many(keys)
+        if len(logged) < len(keys):
+            return None
+        return {pk for ids in logged.values() for pk in ids}
+
+
+# The recommendable job catalog, followed by the scoring engines
+catalog_log = ChangeLog('catalog')
+# Job seeker profiles, followed by the candidate pools
+candidate_pool_log = ChangeLog('candidate_pool')
+
+
+def catalog_position():
+    """Return (epoch, sequence) of the recommendable job catalog"""
+    return catalog_log.position()
+
+
+def catalog_revision():
+    """Return the current revision of the recommendable job catalog"""
+    epoch, sequence = catalog_position()
+    return f'{epoch}:{sequence}'
+
+
+def bump_catalog_revision(job_ids=None):
+    """Mark every process's scoring engine as stale
+
+    With `job_ids`, the change is logged so engines only re-read those
+    jobs; without, every engine is rebuilt.
+    """
+    catalog_log.bump(job_ids)
+
+
+def catalog_changes(since, position, limit=1000):
+    """Ids of the jobs changed between two catalog positions, or None to rebuild"""
+    return catalog_log.changes(since, position, limit)
+
+
+def candidate_pool_position():
+    """Return (epoch, sequence) of the job seeker profiles"""
+    return candidate_pool_log.position()
+
+
+def bump_candidate_pool_revision(user_ids=None):
+    """Mark every process's candidate pool as stale
+
+    With `user_ids`, the change is logged so pools only re-read those
+    seekers' profiles; without, every pool is rebuilt.
+    """
+    candidate_pool_log.bump(user_ids)
+
+
+def candidate_pool_changes(since, position, limit=1000):
+    """User ids of the profiles changed between two pool positions, or None to rebuild"""
+    return candidate_pool_log.changes(since, position, limit)
+
+
+def matching_experience_level(user_experience):
+    """Return the experience level that earns the experience bonus"""
+    if user_experience <= 2:
+        return 'Entry'
+    if user_experience <= 5:
+        return 'Mid'
+    return 'Senior'
+
+
+def location_matches(user_location, job_location):
+    """Case-insensitive containment in either direction"""
+    if not user_location or not job_location:
+        return False
+    user_location = user_location.lower()
+    job_location = job_location.lower()
+    return user_location in job_location or job_location in user_location
+
+
+def score_job(job, user_skills, user_experience, user_location):
+    """Score a single job against a seeker's skills, experience and location
+
+    Reference implementation of the matching rules; ScoringEngine must agree.
+    """
+    score = 0
+    job_skills = set(job.get_skills_list())
+
+    # Skill matching
+    if user_skills and job_skills:
+        common_skills = user_skills.intersection(job_skills)
+        score += len(common_skills) * SKILL_WEIGHT
+
+    # Experience matching
+    if job.experience_level == 'Entry' and user_experience <= 2:
+        score += EXPERIENCE_WEIGHT
+    elif job.experience_level == 'Mid' and 2 < user_experience <= 5:
+        score += EXPERIENCE_WEIGHT
+    elif job.experience_level == 'Senior' and user_experience > 5:
+        score += EXPERIENCE_WEIGHT
+
+    # Location matching (if user has location)
+    if user_location and job.location:
+        job_location = job.location.lower()
+        if user_location in job_location or job_location in user_location:
+            score += LOCATION_WEIGHT
+
+    return score
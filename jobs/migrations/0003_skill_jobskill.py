@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_job_skills(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Skill = apps.get_model('jobs', 'Skill')
+    JobSkill = apps.get_model('jobs', 'JobSkill')
+    max_length = Skill._meta.get_field('name').max_length
+
+    job_skills = {}
+    for job_id, skills_required in Job.objects.values_list('id', 'skills_required').iterator():
+        names = {skill.strip()[:max_length] for skill in (skills_required or '').split(',')}
+        job_skills[job_id] = {name for name in names if name}
+
+    names = set().union(*job_skills.values())
+    Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True, batch_size=1000)
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+
+    JobSkill.objects.bulk_create(
+        [JobSkill(job_id=job_id, skill_id=skill_ids[name])
+         for job_id, names in job_skills.items() for name in names],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_index', to='jobs.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_index', to='jobs.skill')),
+            ],
+            options={
+                'unique_together': {('skill', 'job')},
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='skills',
+            field=models.ManyToManyField(blank=True, related_name='jobs', through='jobs.JobSkill', to='jobs.skill'),
+        ),
+        migrations.RunPython(link_job_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_jobs_verified(apps, schema_editor):
+    # Jobs saved before the queue existed were scored when they were posted
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(is_verified=True).update(verification_status='verified')
+    Job.objects.filter(is_verified=False).update(verification_status='flagged')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='verification_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('verified', 'Verified'), ('flagged', 'Flagged')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_jobs_verified, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('verification_status', 'pending')), fields=['id'], name='job_verification_queue_idx'),
+        ),
+    ]
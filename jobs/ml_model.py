@@ -1,14 +1,27 @@
 """
 ML Model for Fake Job Detection
 This module contains the ML model to predict if a job posting is real or fake.
+
+The model is loaded (or trained) on first use rather than at import time,
+and scikit-learn is only imported then, so management commands and
+processes that never score a job don't pay for it. Models come from the
+versioned registry in model_registry.py, and each process switches to a
+newly published version without a restart.
 """
-import re
-import joblib
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
 import os
+import pickle
+import time
+import threading
 from django.conf import settings
+from .instrumentation import timer
+from .model_registry import ModelRegistry, RegistryError
+from .prediction_cache import PredictionCache
+
+
+# Raised by a missing, corrupt or incompatible model; unpickling a class
+# that moved or no longer exists gives AttributeError or ImportError
+LOAD_ERRORS = (RegistryError, OSError, EOFError, ValueError, KeyError, pickle.UnpicklingError,
+               AttributeError, ImportError)
 
 
 class FakeJobDetector:
@@ -17,25 +30,107 @@ class FakeJobDetector:
     def __init__(self):
         self.model = None
         self.vectorizer = None
-        self.model_path = os.path.join(settings.BASE_DIR, 'jobs', 'ml_models', 'fake_job_detector.pkl')
-        self.vectorizer_path = os.path.join(settings.BASE_DIR, 'jobs', 'ml_models', 'vectorizer.pkl')
-        self._load_or_create_model()
+        self.forest = None
+        self.version = None
+        self.registry = ModelRegistry()
+        # Files written before the registry existed; used until a version is published
+        self.legacy_model_path = os.path.join(self.registry.root, 'fake_job_detector.pkl')
+        self.legacy_vectorizer_path = os.path.join(self.registry.root, 'vectorizer.pkl')
+        self.cache = PredictionCache()
+        self._active = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Load the model on first use and pick up newly published versions; thread-safe"""
+        if self._active is not None and time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            if self._active is None:
+                self._load_or_create_model()
+            elif time.monotonic() >= self._next_check:
+                self._check_for_new_version()
+            self._next_check = time.monotonic() + getattr(settings, 'JOB_MODEL_CHECK_INTERVAL', 30)
     
     def _load_or_create_model(self):
-        """Load existing model or create a new one"""
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        
-        if os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
+        """Load the live version, or a model of this process's own while none is published
+
+        Nothing is published from here: a live version that fails to load
+        raises RegistryError rather than being replaced, so every process
+        keeps to the version the registry names.
+        """
+        version = self.registry.current_version()
+        if version:
             try:
-                self.model = joblib.load(self.model_path)
-                self.vectorizer = joblib.load(self.vectorizer_path)
-            except:
-                self._create_model()
+                self._activate(version)
+            except LOAD_ERRORS as e:
+                raise RegistryError(f'Cannot load the live model version {version}: {e}') from e
+        elif os.path.exists(self.legacy_model_path) and os.path.exists(self.legacy_vectorizer_path):
+            self._load_legacy_model()
         else:
             self._create_model()
     
+    def _load_legacy_model(self):
+        import joblib
+        from .forest import export_forest
+        
+        try:
+            model = joblib.load(self.legacy_model_path)
+            vectorizer = joblib.load(self.legacy_vectorizer_path)
+        except LOAD_ERRORS as e:
+            raise RegistryError(f'Cannot load the legacy model files in {self.registry.root}: {e}') from e
+        self._set_active('legacy', model, vectorizer, export_forest(model))
+    
+    def _check_for_new_version(self):
+        """Switch to the registry's live version if it changed"""
+        version = self.registry.current_version()
+        if version and version != self.version:
+            try:
+                self._activate(version)
+            except LOAD_ERRORS:
+                # Keep serving the version already loaded
+                pass
+    
+    def _activate(self, version):
+        # Unpickling sklearn trees copies their node arrays, so when the
+        # version has a flattened forest the estimator stays on disk and
+        # workers share the memory-mapped forest instead
+        if 'forest' in self.registry.manifest(version)['files']:
+            artifacts = self.registry.load(version, names=('forest', 'vectorizer'))
+            self._set_active(version, None, artifacts['vectorizer'], artifacts['forest'])
+            return
+        from .forest import export_forest
+        artifacts = self.registry.load(version)
+        self._set_active(version, artifacts['model'], artifacts['vectorizer'], export_forest(artifacts['model']))
+    
+    def _set_active(self, version, model, vectorizer, forest):
+        # Predictions read the tuple once, so a swap never mixes two versions
+        self._active = (version, model, vectorizer, forest)
+        self.version, self.model, self.vectorizer, self.forest = self._active
+    
+    def estimator(self):
+        """Return the live sklearn model, reading it from the registry if serving left it on disk"""
+        self.load()
+        version, model, vectorizer, forest = self._active
+        if model is None:
+            model = self.registry.load(version, names=('model',))['model']
+        return model
+    
+    def publish(self, model, vectorizer, metadata=None, activate=True):
+        """Publish a model to the registry, with its flattened forest when it has one"""
+        from .forest import export_forest
+        
+        artifacts = {'model': model, 'vectorizer': vectorizer}
+        forest = export_forest(model)
+        if forest is not None:
+            artifacts['forest'] = forest
+        return self.registry.publish(artifacts, metadata=metadata, activate=activate)
+    
     def _create_model(self):
-        """Create and train a new model"""
+        """Create and train a stand-in model, kept in this process until train_detector publishes one"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.ensemble import RandomForestClassifier
+        
         # Simple feature extraction
         self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
         
@@ -73,70 +168,103 @@ class FakeJobDetector:
         # Train
         self.model.fit(X, labels)
         
-        # Save
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.vectorizer, self.vectorizer_path)
+        from .forest import export_forest
+        
+        self._set_active('synthetic', self.model, self.vectorizer, export_forest(self.model))
     
     def extract_features(self, title, description, requirements, company_name):
         """Extract features from job posting"""
-        # Combine all text
-        text = f"{title} {description} {requirements} {company_name}".lower()
-        
-        # Rule-based features
-        features = {
-            'has_salary_info': bool(re.search(r'\$\d+|\d+\s*(k|thousand|million)', text)),
-            'has_experience_requirement': bool(re.search(r'\d+\+?\s*(year|yr)', text)),
-            'has_skills': bool(re.search(r'(skill|experience|knowledge|proficient)', text)),
-            'suspicious_words': len(re.findall(r'(urgent|guaranteed|easy money|work from home|no experience)', text)),
-            'has_contact_info': bool(re.search(r'(email|phone|contact|apply)', text)),
-            'text_length': len(text),
-            'has_company_info': len(company_name) > 3,
-        }
-        
-        return features
+        from .rule_features import extract_features
+        
+        return extract_features(title, description, requirements, company_name)
     
     def predict(self, title, description, requirements, company_name):
         """Predict if job is real or fake"""
+        return self.predict_batch([(title, description, requirements, company_name)])[0]
+    
+    def predict_batch(self, postings):
+        """Predict many (title, description, requirements, company_name) postings at once"""
+        self.load()
+        postings = list(postings)
+        if not postings:
+            return []
+        
+        # Postings seen before under this model version skip the model;
+        # duplicates within the batch are scored once
+        version, model, vectorizer, forest = self._active
+        keys = [self.cache.key(version, posting) for posting in postings]
+        predictions = self.cache.get_many(keys)
+        pending = {}
+        for key, posting in zip(keys, postings):
+            if key not in predictions:
+                pending.setdefault(key, posting)
+        
+        if pending:
+            with timer('ml'):
+                fresh, from_model = self._predict_uncached(model, vectorizer, forest, list(pending.values()))
+            fresh = dict(zip(pending, fresh))
+            if from_model:
+                self.cache.set_many(fresh)
+            predictions.update(fresh)
+        
+        return [dict(predictions[key]) for key in keys]
+    
+    def cache_info(self):
+        """Prediction cache hit/miss counters"""
+        return self.cache.cache_info()
+    
+    def _predict_uncached(self, model, vectorizer, forest, postings):
+        """Run the model over postings; returns (predictions, whether the model produced them)"""
         # Combine text for vectorization
-        combined_text = f"{title} {description} {requirements} {company_name}"
+        texts = [f"{title} {description} {requirements} {company_name}"
+                 for title, description, requirements, company_name in postings]
         
-        # Vectorize
+        # One transform and one predict_proba pass for the whole batch;
+        # the label is the most probable class, as model.predict would pick.
+        # The flattened forest gives the same probabilities without
+        # sklearn's per-call overhead.
         try:
-            X = self.vectorizer.transform([combined_text])
-            prediction = self.model.predict(X)[0]
-            probability = self.model.predict_proba(X)[0]
-            confidence = max(probability)
+            X = vectorizer.transform(texts)
+            if forest is not None:
+                probabilities, classes = forest.predict_proba(X), forest.classes
+            else:
+                probabilities, classes = model.predict_proba(X), model.classes_
+            best = probabilities.argmax(axis=1)
+            predictions = classes[best]
+            confidences = probabilities[range(len(postings)), best]
         except:
             # Fallback to rule-based prediction
-            features = self.extract_features(title, description, requirements, company_name)
-            # Simple scoring
-            score = 0
-            if features['has_salary_info']:
-                score += 1
-            if features['has_experience_requirement']:
-                score += 1
-            if features['has_skills']:
-                score += 1
-            if features['has_contact_info']:
-                score += 1
-            if features['has_company_info']:
-                score += 1
-            score -= features['suspicious_words'] * 2
-            
-            prediction = 1 if score >= 2 else 0
-            confidence = abs(score) / 5.0
-        
-        return {
-            'is_real': bool(prediction),
-            'confidence': float(confidence),
-            'is_fake': not bool(prediction)
-        }
-
-
-# Global instance
+            return self.predict_rule_based(postings), False
+        
+        return self._predictions(predictions, confidences), True
+    
+    def predict_rule_based(self, postings):
+        """Score postings with the rule-based features alone, e.g. while no model can be loaded"""
+        from .rule_features import rule_based_predictions
+        
+        return self._predictions(*rule_based_predictions(postings))
+    
+    @staticmethod
+    def _predictions(predictions, confidences):
+        return [
+            {
+                'is_real': bool(prediction),
+                'confidence': float(confidence),
+                'is_fake': not bool(prediction)
+            }
+            for prediction, confidence in zip(predictions, confidences)
+        ]
+
+
+# Global instance; the model itself is loaded on first prediction
 detector = FakeJobDetector()
 
 
+def warm_up():
+    """Load the model now, e.g. in the gunicorn master before workers fork"""
+    detector.load()
+
+
 
 
 
@@ -0,0 +1,133 @@
+"""
+Versioned model registry
+Each published model lives in its own directory under jobs/ml_models/
+with a manifest of file checksums, and a CURRENT file names the live
+version. Versions are written to a temporary directory and renamed into
+place, and CURRENT is swapped with os.replace, so readers never see a
+half-written model. Artifacts are stored uncompressed so they can be
+loaded with mmap_mode and share page-cache memory between processes.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+
+MANIFEST_NAME = 'manifest.json'
+CURRENT_NAME = 'CURRENT'
+
+
+class RegistryError(Exception):
+    pass
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Publish, list and load versions of a set of joblib artifacts"""
+
+    def __init__(self, root=None):
+        self.root = root or getattr(settings, 'JOB_MODEL_REGISTRY_DIR',
+                                    os.path.join(settings.BASE_DIR, 'jobs', 'ml_models'))
+
+    def path(self, version, name=''):
+        return os.path.join(self.root, version, name)
+
+    def current_version(self):
+        """Return the live version, or None before anything is published"""
+        try:
+            with open(os.path.join(self.root, CURRENT_NAME)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        """Return the manifests of all published versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for name in os.listdir(self.root):
+            if os.path.exists(self.path(name, MANIFEST_NAME)):
+                manifests.append(self.manifest(name))
+        return sorted(manifests, key=lambda manifest: manifest['created_at'])
+
+    def manifest(self, version):
+        try:
+            with open(self.path(version, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RegistryError(f'Unknown model version {version!r}')
+
+    def publish(self, artifacts, metadata=None, activate=True):
+        """Write {name: object} as a new version and optionally make it live"""
+        import joblib
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.publish-', dir=self.root)
+        try:
+            os.chmod(staging, 0o755)
+            files = {}
+            for name, obj in artifacts.items():
+                filename = f'{name}.joblib'
+                joblib.dump(obj, os.path.join(staging, filename))
+                files[name] = {'file': filename, 'sha256': file_checksum(os.path.join(staging, filename))}
+
+            created_at = timezone.now()
+            fingerprint = hashlib.sha256(
+                ''.join(files[name]['sha256'] for name in sorted(files)).encode()
+            ).hexdigest()
+            version = f'{created_at:%Y%m%d%H%M%S}-{fingerprint[:8]}'
+            manifest = {
+                'version': version,
+                'created_at': created_at.isoformat(),
+                'files': files,
+                'metadata': metadata or {},
+            }
+            with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            os.rename(staging, self.path(version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Atomically point CURRENT at a published version"""
+        self.manifest(version)
+        fd, temp_path = tempfile.mkstemp(prefix='.current-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, os.path.join(self.root, CURRENT_NAME))
+
+    def load(self, version, verify=True, mmap_mode='r', names=None):
+        """Return {name: object} for a version, checking the manifest checksums
+
+        With `names`, only those artifacts are read.
+        """
+        import joblib
+
+        manifest = self.manifest(version)
+        artifacts = {}
+        for name, entry in manifest['files'].items():
+            if names is not None and name not in names:
+                continue
+            path = self.path(version, entry['file'])
+            if verify and file_checksum(path) != entry['sha256']:
+                raise RegistryError(f'Checksum mismatch for {name} in model version {version}')
+            artifacts[name] = joblib.load(path, mmap_mode=mmap_mode)
+        return artifacts
@@ -5,6 +5,39 @@ from django.urls import reverse
 User = get_user_model()
 
 
+class SkillManager(models.Manager):
+    def for_names(self, names):
+        """Return Skill rows for the given names, creating any that are missing"""
+        max_length = self.model._meta.get_field('name').max_length
+        names = {name[:max_length] for name in names if name}
+        if not names:
+            return self.none()
+        self.bulk_create([self.model(name=name) for name in names], ignore_conflicts=True)
+        return self.filter(name__in=names)
+
+
+class Skill(models.Model):
+    """Canonical skill shared by jobs and job seeker profiles"""
+    name = models.CharField(max_length=200, unique=True)
+
+    objects = SkillManager()
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class JobQuerySet(models.QuerySet):
+    def with_skill_overlap(self, skill_ids):
+        """Jobs sharing at least one of `skill_ids`, annotated with the overlap count
+
+        One aggregation over the (skill, job) index of JobSkill.
+        """
+        return self.filter(skills__in=skill_ids).annotate(skill_overlap=models.Count('skills'))
+
+
 class Job(models.Model):
     JOB_TYPE_CHOICES = [
         ('Full-time', 'Full-time'),
@@ -21,6 +54,13 @@ class Job(models.Model):
         ('Executive', 'Executive'),
     ]
     
+    VERIFICATION_PENDING = 'pending'
+    VERIFICATION_STATUS_CHOICES = [
+        (VERIFICATION_PENDING, 'Pending'),
+        ('verified', 'Verified'),
+        ('flagged', 'Flagged'),
+    ]
+    
     posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posted_jobs')
     title = models.CharField(max_length=200)
     company_name = models.CharField(max_length=200)
@@ -35,13 +75,33 @@ class Job(models.Model):
     is_remote = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)  # ML prediction result
     ml_confidence = models.FloatField(default=0.0, help_text="ML model confidence score")
+    verification_status = models.CharField(max_length=20, choices=VERIFICATION_STATUS_CHOICES,
+                                           default=VERIFICATION_PENDING)
     posted_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
     deadline = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    skills = models.ManyToManyField(Skill, through='JobSkill', related_name='jobs', blank=True)
+    
+    objects = JobQuerySet.as_manager()
     
     class Meta:
         ordering = ['-posted_date']
+        indexes = [
+            # home / job_list: active jobs, newest first (keyset on posted_date, id)
+            models.Index(fields=['-posted_date', '-id'], condition=models.Q(is_active=True),
+                         name='job_active_recent_idx'),
+            # ScoringEngine.build: active, verified jobs, newest first
+            models.Index(fields=['-posted_date', '-id'], condition=models.Q(is_active=True, is_verified=True),
+                         name='job_recommendable_idx'),
+            # ContentIndex.updated: jobs edited since the index was built
+            models.Index(fields=['updated_date'], name='job_updated_idx'),
+            # my_jobs: a recruiter's jobs, newest first
+            models.Index(fields=['posted_by', '-posted_date'], name='job_poster_recent_idx'),
+            # verification worker: the queue of jobs awaiting the detector
+            models.Index(fields=['id'], condition=models.Q(verification_status='pending'),
+                         name='job_verification_queue_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.company_name}"
@@ -66,9 +126,82 @@ class Job(models.Model):
         return "Not specified"
 
 
+class JobSkill(models.Model):
+    """Job/skill link, indexed by skill so it doubles as an inverted index"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_index')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='job_index')
+
+    class Meta:
+        unique_together = ('skill', 'job')
+
+    def __str__(self):
+        return f"{self.skill_id} -> {self.job_id}"
+
+
+class JobSearchEntry(models.Model):
+    """A job's row in the SQLite FTS5 search table, joined to MATCH and rank it
+
+    The table and the triggers that fill it are created by jobs.search,
+    and only on SQLite.
+    """
+    job = models.OneToOneField(Job, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+                               db_constraint=False, related_name='search_entry')
+
+    class Meta:
+        managed = False
+        db_table = 'jobs_job_fts'
+
+
+class Recommendation(models.Model):
+    """Precomputed top-N recommendation for a job seeker"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='recommendations')
+    rank = models.PositiveIntegerField()
+    score = models.IntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'rank')
+        ordering = ['user', 'rank']
+
+    def __str__(self):
+        return f"{self.user_id} #{self.rank}: {self.job_id}"
+
+
+class SimilarJob(models.Model):
+    """Precomputed nearest neighbour of a job by text similarity"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_jobs')
+    similar = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('job', 'rank')
+        ordering = ['job', 'rank']
+
+    def __str__(self):
+        return f"{self.job_id} #{self.rank}: {self.similar_id}"
 
 
+class JobFingerprint(models.Model):
+    """MinHash signature of a job's text, and the earliest posting it nearly duplicates"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+    duplicate_of = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='duplicates')
 
+    def __str__(self):
+        return f"{self.job_id} -> {self.duplicate_of_id}"
 
 
+class JobBand(models.Model):
+    """One LSH band of a job's signature, indexed by bucket to find near-duplicates"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='lsh_bands')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField(db_index=True)
 
+    class Meta:
+        unique_together = ('job', 'band')
+
+    def __str__(self):
+        return f"{self.job_id} band {self.band}: {self.bucket}"
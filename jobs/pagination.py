@@ -0,0 +1,94 @@
+"""
+Keyset (cursor) pagination
+Pages through a queryset ordered newest first on (posted_date, id) by
+filtering on the last row seen instead of using OFFSET, so every page
+costs the same as the first.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a queryset newest first on (date_field, id)"""
+
+    def __init__(self, queryset, per_page, date_field='posted_date'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+
+    def encode_cursor(self, obj, direction):
+        value = f'{direction}|{getattr(obj, self.date_field).isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return (direction, date, id), or None for a missing or malformed cursor"""
+        if not cursor:
+            return None
+        try:
+            value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            direction, date, pk = value.split('|')
+            if direction not in ('next', 'prev'):
+                return None
+            return direction, datetime.fromisoformat(date), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+
+    def page(self, cursor=None):
+        position = self.decode_cursor(cursor)
+        date_field = self.date_field
+
+        if position is None:
+            rows = list(self.queryset.order_by(f'-{date_field}', '-pk')[:self.per_page + 1])
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return KeysetPage(rows, self._cursor(rows, -1, 'next') if more else None)
+
+        direction, date, pk = position
+        if direction == 'next':
+            after = Q(**{f'{date_field}__lt': date}) | Q(**{date_field: date, 'pk__lt': pk})
+            rows = list(self.queryset.filter(after).order_by(f'-{date_field}', '-pk')[:self.per_page + 1])
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return KeysetPage(
+                rows,
+                next_cursor=self._cursor(rows, -1, 'next') if more else None,
+                previous_cursor=self._cursor(rows, 0, 'prev'),
+            )
+
+        before = Q(**{f'{date_field}__gt': date}) | Q(**{date_field: date, 'pk__gt': pk})
+        rows = list(self.queryset.filter(before).order_by(date_field, 'pk')[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor(rows, -1, 'next'),
+            previous_cursor=self._cursor(rows, 0, 'prev') if more else None,
+        )
+
+    def _cursor(self, rows, index, direction):
+        return self.encode_cursor(rows[index], direction) if rows else None
@@ -0,0 +1,83 @@
+"""
+Prediction cache for the fake job detector
+Predictions are keyed by a hash of the normalized posting text and the
+model version, and kept in a bounded in-process LRU backed by the shared
+Django cache, so unchanged or duplicate postings skip the model.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'shared_hits', 'misses', 'maxsize', 'currsize'])
+
+
+def posting_digest(title, description, requirements, company_name):
+    """Hash of a posting's text, ignoring case and runs of whitespace"""
+    fields = (' '.join(str(field).lower().split()) for field in (title, description, requirements, company_name))
+    return hashlib.sha256('\x1f'.join(fields).encode()).hexdigest()
+
+
+class PredictionCache:
+    """Bounded LRU of predictions in front of the shared cache"""
+
+    def __init__(self, maxsize=None, timeout=None):
+        self.maxsize = maxsize if maxsize is not None else getattr(settings, 'JOB_PREDICTION_CACHE_SIZE', 10000)
+        self.timeout = timeout if timeout is not None else getattr(settings, 'JOB_PREDICTION_CACHE_TIMEOUT', 24 * 60 * 60)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.shared_hits = self.misses = 0
+
+    def key(self, model_version, posting):
+        return f'jobs:prediction:{model_version}:{posting_digest(*posting)}'
+
+    def get_many(self, keys):
+        """Return {key: prediction} for the keys cached locally or in the shared cache"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self.hits += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = cache.get_many(missing)
+            if shared:
+                self._remember(shared)
+                found.update(shared)
+            with self._lock:
+                self.shared_hits += len(shared)
+                self.misses += len(missing) - len(shared)
+        return found
+
+    def set_many(self, predictions):
+        """Store {key: prediction} locally and in the shared cache"""
+        if not predictions:
+            return
+        self._remember(predictions)
+        cache.set_many(predictions, timeout=self.timeout)
+
+    def _remember(self, predictions):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for key, prediction in predictions.items():
+                self._entries[key] = prediction
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.shared_hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Drop the local entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
@@ -0,0 +1,249 @@
+"""
+Job recommendation scoring
+Matches a job seeker's profile against active, verified jobs.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import timer
+from .matching import COLLABORATIVE_WEIGHT, CONTENT_WEIGHT, EXPERIENCE_WEIGHT, LOCATION_WEIGHT, catalog_revision
+from .models import Job, Recommendation, Skill
+
+
+CATALOG_VERSION_KEY = 'recommendations:catalog_version'
+
+
+def sync_job_skills(job):
+    """Bring a job's Skill links in line with its comma-separated skills
+
+    Returns the ids of every skill the job was linked to before or after.
+    """
+    old_ids = set(job.skills.values_list('pk', flat=True))
+    skills = list(Skill.objects.for_names(job.get_skills_list()))
+    job.skills.set(skills)
+    return old_ids | {skill.pk for skill in skills}
+
+
+def recommendation_limit():
+    return getattr(settings, 'RECOMMENDATION_LIMIT', 100)
+
+
+def cache_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def profile_version(profile):
+    return profile.updated_at.timestamp() if profile.updated_at else None
+
+
+def collaborative_version():
+    """Version of the live collaborative filtering model, or None"""
+    from .collaborative import collaborative
+
+    return collaborative.version()
+
+
+def precomputed_max_age():
+    return getattr(settings, 'RECOMMENDATION_PRECOMPUTE_MAX_AGE', 2 * 24 * 60 * 60)
+
+
+def catalog_version():
+    """Time of the last change to the whole catalog made outside of Job signals"""
+    return cache.get_or_set(CATALOG_VERSION_KEY, 0, timeout=None)
+
+
+def invalidate_all_recommendations():
+    """Expire every cached and precomputed recommendation list"""
+    cache.set(CATALOG_VERSION_KEY, time.time(), timeout=None)
+
+
+def skill_version_key(skill_id):
+    return f'recommendations:skill:{skill_id}'
+
+
+def invalidate_recommendations(user_ids):
+    """Expire the cached recommendation lists of the given users
+
+    Precomputed rows older than a profile edit are already ignored.
+    """
+    cache.delete_many([cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_recommendations_for_skills(skill_ids):
+    """Expire the lists of every seeker who has one of the given skills
+
+    Each skill's version is set to now, so the cost grows with the skills
+    of the changed job rather than with the seekers who share them.
+    """
+    if skill_ids:
+        cache.set_many(dict.fromkeys([skill_version_key(skill_id) for skill_id in skill_ids], time.time()),
+                       timeout=None)
+
+
+def skill_version(skill_ids):
+    """Time of the last change to a listed job with one of `skill_ids`, 0 if none
+
+    A version evicted from the cache is set to now, so lists computed
+    before the eviction are recomputed rather than served stale.
+    """
+    keys = [skill_version_key(skill_id) for skill_id in skill_ids]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = cache.get_or_set(key, time.time, timeout=None)
+    return max(versions.values(), default=0)
+
+
+def is_skill_bound(ranked, limit):
+    """Whether only jobs sharing a skill with the seeker can change this list"""
+    without_skills = EXPERIENCE_WEIGHT + LOCATION_WEIGHT + COLLABORATIVE_WEIGHT + CONTENT_WEIGHT
+    return len(ranked) == limit and ranked[-1][1] > without_skills
+
+
+def seeker_text(skills, bio):
+    """The profile text scored for content similarity"""
+    return f'{skills} {bio}'
+
+
+def rank_jobs(engine, skill_ids, experience_years, location, limit, user_id=None, text=None):
+    """Score a seeker with `engine` and return the top (job id, score) pairs
+
+    With a user id, the collaborative filter's bonus is added to the
+    rule-based scores, and with the seeker's text, the content
+    similarity bonus.
+    """
+    from .collaborative import collaborative
+    from .content import get_content_index
+    from .scoring import top_k
+
+    with timer('scoring'):
+        scores = engine.score(skill_ids, experience_years, location)
+        if user_id is not None:
+            bonus = collaborative.bonus(user_id, engine.job_ids)
+            if bonus is not None:
+                scores += bonus
+        index = get_content_index() if text else None
+        if index is not None:
+            bonus = index.bonus(text, engine.job_ids)
+            if bonus is not None:
+                scores += bonus
+        rows = top_k(scores, limit)
+    return list(zip(engine.job_ids[rows].tolist(), scores[rows].tolist()))
+
+
+def precomputed_recommendations(profile, skill_changed_at=0):
+    """Return the stored top-N list for a profile, or None if it may be stale"""
+    rows = list(
+        Recommendation.objects.filter(user_id=profile.user_id)
+        .order_by('rank').values_list('job_id', 'score', 'computed_at')
+    )
+    if not rows:
+        return None
+
+    computed_at = rows[0][2].timestamp()
+    cutoff = max(
+        time.time() - precomputed_max_age(),
+        profile_version(profile) or 0,
+        catalog_version(),
+        skill_changed_at,
+    )
+    ranked = [(job_id, score) for job_id, score, _ in rows]
+    if computed_at < cutoff or not is_skill_bound(ranked, recommendation_limit()):
+        return None
+    return ranked
+
+
+class Recommendations:
+    """Ranked recommendations for a profile, sliceable so Paginator can page them
+
+    Lists come from the cache, then from the precomputed Recommendation rows
+    (one indexed query), and are only scored live when neither is current.
+    The top RECOMMENDATION_LIMIT (job id, score) pairs are cached per user,
+    tagged with the profile, catalog and collaborative model versions they
+    were computed from.
+    Job signals bump the versions of the changed job's skills, so only the
+    lists of seekers with one of those skills expire: a list is current
+    while none of its seeker's skills changed after it was computed. Lists
+    that reach into experience/location-only matches (or are shorter than
+    the limit) can also change when unrelated jobs do, so those are
+    additionally tied to the engine's catalog revision.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self._ranked = None
+
+    def _is_current(self, entry):
+        if entry is None or 'skill_ids' not in entry:
+            return False
+        if (entry['profile_version'], entry['catalog_version']) != (profile_version(self.profile), catalog_version()):
+            return False
+        if entry.get('collaborative_version') != collaborative_version():
+            return False
+        keys = [skill_version_key(skill_id) for skill_id in entry['skill_ids']]
+        versions = cache.get_many(keys)
+        if len(versions) < len(keys) or max(versions.values(), default=0) > entry['computed_at']:
+            return False
+        return entry['skill_bound'] or entry['catalog_revision'] == catalog_revision()
+
+    def _load(self):
+        if self._ranked is not None:
+            return
+        key = cache_key(self.profile.user_id)
+        entry = cache.get(key)
+        if not self._is_current(entry):
+            revision = catalog_revision()
+            limit = recommendation_limit()
+            skill_ids = list(self.profile.skill_set.values_list('pk', flat=True))
+            skill_changed_at = skill_version(skill_ids)
+            computed_at = time.time()
+            ranked = precomputed_recommendations(self.profile, skill_changed_at)
+            if ranked is None:
+                from .scoring import get_engine
+                ranked = rank_jobs(
+                    get_engine(),
+                    skill_ids,
+                    self.profile.experience_years,
+                    self.profile.location,
+                    limit,
+                    user_id=self.profile.user_id,
+                    text=seeker_text(self.profile.skills, self.profile.bio),
+                )
+            entry = {
+                'profile_version': profile_version(self.profile),
+                'catalog_version': catalog_version(),
+                'catalog_revision': revision,
+                'collaborative_version': collaborative_version(),
+                'skill_ids': skill_ids,
+                'computed_at': computed_at,
+                'skill_bound': is_skill_bound(ranked, limit),
+                'ranked': ranked,
+            }
+            cache.set(key, entry, getattr(settings, 'RECOMMENDATION_CACHE_TIMEOUT', 3600))
+        self._ranked = entry['ranked']
+
+    def count(self):
+        self._load()
+        return len(self._ranked)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('Recommendations only support contiguous slices')
+        self._load()
+        ranked = self._ranked[index]
+        if not ranked:
+            return []
+
+        # Normalize to a percentage of the best match, which is ranked first
+        max_score = self._ranked[0][1]
+        jobs = Job.objects.in_bulk([job_id for job_id, _ in ranked])
+        return [
+            (jobs[job_id], min(int((score / max_score) * 100), 100))
+            for job_id, score in ranked
+            if job_id in jobs
+        ]
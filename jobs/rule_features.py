@@ -0,0 +1,100 @@
+"""
+Rule-based features for fake job detection
+Computes FakeJobDetector's rule features with precompiled patterns, and
+answers the literal keyword rules with plain substring searches, which
+run in C without regex overhead. The results match the original
+per-rule regexes.
+
+This is several passes over the text, not one: a single alternation
+scanned with finditer has to try every rule at every position inside a
+lookahead (rules overlap, as in "no experience"), and CPython's re runs
+that slower than the substring searches plus two small patterns.
+"""
+import re
+
+import numpy as np
+
+
+SALARY_PATTERN = re.compile(r'\$\d+|\d+\s*(k|thousand|million)')
+EXPERIENCE_PATTERN = re.compile(r'\d+\+?\s*(year|yr)')
+SKILL_WORDS = ('skill', 'experience', 'knowledge', 'proficient')
+CONTACT_WORDS = ('email', 'phone', 'contact', 'apply')
+SUSPICIOUS_PHRASES = ('urgent', 'guaranteed', 'easy money', 'work from home', 'no experience')
+SUSPICIOUS_PATTERN = re.compile('|'.join(re.escape(phrase) for phrase in SUSPICIOUS_PHRASES))
+
+
+def _overlaps(phrases):
+    """Strings in which two phrases share characters
+
+    Summing str.count per phrase only differs from re.findall's
+    leftmost, non-overlapping count when one of these occurs.
+    """
+    overlaps = set()
+    for a in phrases:
+        for b in phrases:
+            if a != b and a in b:
+                overlaps.add(b)
+            for size in range(1, min(len(a), len(b))):
+                if a[-size:] == b[:size]:
+                    overlaps.add(a + b[size:])
+    return tuple(overlaps)
+
+
+SUSPICIOUS_OVERLAPS = _overlaps(SUSPICIOUS_PHRASES)
+
+
+def count_suspicious(text):
+    """len(re.findall(...)) over the suspicious lexicon, usually without the regex"""
+    if any(overlap in text for overlap in SUSPICIOUS_OVERLAPS):
+        return len(SUSPICIOUS_PATTERN.findall(text))
+    return sum(text.count(phrase) for phrase in SUSPICIOUS_PHRASES)
+
+
+FEATURE_NAMES = (
+    'has_salary_info',
+    'has_experience_requirement',
+    'has_skills',
+    'suspicious_words',
+    'has_contact_info',
+    'text_length',
+    'has_company_info',
+)
+
+# Fallback score: +1 per positive signal, -2 per suspicious phrase
+SCORE_WEIGHTS = np.array([1, 1, 1, -2, 1, 0, 1], dtype=np.int64)
+
+
+def _features(text, company_name):
+    """Feature values in FEATURE_NAMES order for lowercased `text`"""
+    return (
+        SALARY_PATTERN.search(text) is not None,
+        EXPERIENCE_PATTERN.search(text) is not None,
+        any(word in text for word in SKILL_WORDS),
+        count_suspicious(text),
+        any(word in text for word in CONTACT_WORDS),
+        len(text),
+        len(company_name) > 3,
+    )
+
+
+def extract_features(title, description, requirements, company_name):
+    """Rule features for one posting, as a dict"""
+    text = f"{title} {description} {requirements} {company_name}".lower()
+    return dict(zip(FEATURE_NAMES, _features(text, company_name)))
+
+
+def feature_matrix(postings):
+    """Rule features for many postings, one row each, columns in FEATURE_NAMES order"""
+    rows = [
+        _features(f"{title} {description} {requirements} {company_name}".lower(), company_name)
+        for title, description, requirements, company_name in postings
+    ]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(FEATURE_NAMES))
+
+
+def rule_based_predictions(postings):
+    """Fallback (predictions, confidences) arrays for many postings"""
+    scores = feature_matrix(postings) @ SCORE_WEIGHTS
+    predictions = (scores >= 2).astype(np.int64)
+    confidences = np.abs(scores) / 5.0
+    return predictions, confidences
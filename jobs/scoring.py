@@ -0,0 +1,234 @@
+"""
+Vectorized recommendation scoring
+Keeps a sparse job x skill matrix plus compact experience and location
+arrays so a seeker can be scored against every job with one sparse
+mat-vec and a few array operations.
+"""
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+
+from .matching import (
+    EXPERIENCE_LEVELS, EXPERIENCE_WEIGHT, LOCATION_WEIGHT, SKILL_WEIGHT,
+    catalog_changes, catalog_position, location_matches, matching_experience_level,
+)
+from .models import Job, JobSkill
+
+
+def top_k(scores, k, offset=0):
+    """Rows of the best positive scores ranked offset..offset+k, best first
+
+    Ties keep row order. Only the selected rows are sorted, so the cost of
+    ordering grows with offset + k rather than with the number of jobs.
+    """
+    positive = np.flatnonzero(scores > 0)
+    end = min(offset + k, len(positive))
+    if end <= offset:
+        return positive[:0]
+
+    # Unique descending key: higher score first, then lower row
+    keys = scores[positive].astype(np.int64) * len(scores) - positive
+    if end < len(positive):
+        selected = np.argpartition(-keys, end - 1)[:end]
+    else:
+        selected = np.arange(len(positive))
+    ranked = selected[np.argsort(-keys[selected])]
+    return positive[ranked[offset:end]]
+
+
+def stack_skill_rows(*parts):
+    """Stack (CSR rows, column skill ids) parts over the union of their skill columns
+
+    Returns (skill_ids, skill_matrix).
+    """
+    skill_ids = np.unique(np.concatenate([columns for _, columns in parts]))
+    skill_matrix = sparse.vstack([
+        sparse.csr_matrix((matrix.data, np.searchsorted(skill_ids, columns)[matrix.indices], matrix.indptr),
+                          shape=(matrix.shape[0], len(skill_ids)))
+        for matrix, columns in parts
+    ], format='csr')
+    return skill_ids, skill_matrix
+
+
+def stack_location_rows(*parts):
+    """Stack (location codes, locations) parts, numbering the locations of the first part first
+
+    Returns (locations, location_ids).
+    """
+    location_index = {}
+    location_ids = []
+    for codes, locations in parts:
+        recoded = np.array([location_index.setdefault(location, len(location_index)) for location in locations],
+                           dtype=np.int32)
+        location_ids.append(recoded[codes])
+    return list(location_index), np.concatenate(location_ids)
+
+
+class ScoringEngine:
+    """Scores a seeker against all active, verified jobs at once"""
+
+    def __init__(self, job_ids, posted, skill_ids, skill_matrix, experience_codes, location_ids, locations):
+        self.job_ids = job_ids                  # int64, one per row, in listing order
+        self.posted = posted                    # float64 posted_date timestamp per row
+        self.skill_ids = skill_ids              # int64, sorted, one per column
+        self.skill_matrix = skill_matrix        # CSR, rows=jobs, cols=skills, 0/1
+        self.experience_codes = experience_codes  # int8 index into EXPERIENCE_LEVELS
+        self.location_ids = location_ids        # int32 index into locations
+        self.locations = locations              # distinct lowercased job locations
+        self.position = None
+        self.built_at = None
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    @classmethod
+    def build(cls, jobs=None):
+        """Build the engine from the database"""
+        if jobs is None:
+            jobs = Job.objects.filter(is_active=True, is_verified=True)
+        jobs = jobs.order_by('-posted_date', '-id')
+
+        rows = list(jobs.values_list('id', 'posted_date', 'experience_level', 'location'))
+        job_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        posted = np.fromiter((row[1].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+
+        level_codes = {level: code for code, level in enumerate(EXPERIENCE_LEVELS)}
+        experience_codes = np.fromiter(
+            (level_codes.get(row[2], -1) for row in rows), dtype=np.int8, count=len(rows)
+        )
+
+        location_index = {}
+        location_ids = np.fromiter(
+            (location_index.setdefault(row[3].lower(), len(location_index)) for row in rows),
+            dtype=np.int32, count=len(rows),
+        )
+        locations = list(location_index)
+
+        links = np.array(
+            list(JobSkill.objects.filter(job__in=jobs.order_by().values('pk'))
+                 .values_list('job_id', 'skill_id')),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+
+        # Map job ids to rows, dropping links to jobs that changed in between
+        sorter = np.argsort(job_ids)
+        positions = np.searchsorted(job_ids, links[:, 0], sorter=sorter)
+        positions = np.minimum(positions, max(len(job_ids) - 1, 0))
+        found = job_ids[sorter[positions]] == links[:, 0] if len(job_ids) else np.zeros(len(links), bool)
+        links = links[found]
+        link_rows = sorter[positions[found]]
+
+        skill_ids, link_cols = np.unique(links[:, 1], return_inverse=True)
+        skill_matrix = sparse.csr_matrix(
+            (np.ones(len(links), dtype=np.int32), (link_rows, link_cols.ravel())),
+            shape=(len(job_ids), len(skill_ids)),
+        )
+        skill_matrix.sum_duplicates()
+        skill_matrix.data[:] = 1
+
+        return cls(job_ids, posted, skill_ids, skill_matrix, experience_codes, location_ids, locations)
+
+    def patched(self, job_ids):
+        """A copy with the rows of `job_ids` re-read from the database
+
+        Rows of jobs no longer listed are dropped and the others replaced,
+        so the cost grows with the changed jobs plus a pass over the arrays.
+        """
+        job_ids = np.fromiter(job_ids, dtype=np.int64)
+        fresh = ScoringEngine.build(Job.objects.filter(pk__in=job_ids.tolist(), is_active=True, is_verified=True))
+        keep = ~np.isin(self.job_ids, job_ids)
+
+        skill_ids, skill_matrix = stack_skill_rows(
+            (self.skill_matrix[keep], self.skill_ids), (fresh.skill_matrix, fresh.skill_ids),
+        )
+        locations, location_ids = stack_location_rows(
+            (self.location_ids[keep], self.locations), (fresh.location_ids, fresh.locations),
+        )
+
+        ids = np.concatenate([self.job_ids[keep], fresh.job_ids])
+        posted = np.concatenate([self.posted[keep], fresh.posted])
+        # Listing order: newest first, then highest id
+        order = np.lexsort((-ids, -posted))
+        return ScoringEngine(
+            ids[order], posted[order], skill_ids, skill_matrix[order],
+            np.concatenate([self.experience_codes[keep], fresh.experience_codes])[order],
+            location_ids[order], locations,
+        )
+
+    def skill_vector(self, skill_ids):
+        """Binary seeker vector over the engine's skill columns"""
+        vector = np.zeros(len(self.skill_ids), dtype=np.int32)
+        skill_ids = np.asarray(list(skill_ids), dtype=np.int64)
+        if len(self.skill_ids) and len(skill_ids):
+            columns = np.searchsorted(self.skill_ids, skill_ids)
+            columns = np.minimum(columns, len(self.skill_ids) - 1)
+            vector[columns[self.skill_ids[columns] == skill_ids]] = 1
+        return vector
+
+    def score(self, skill_ids, experience_years, location):
+        """Return an int32 score per job row"""
+        scores = self.skill_matrix @ self.skill_vector(skill_ids)
+        scores *= SKILL_WEIGHT
+
+        level = EXPERIENCE_LEVELS.index(matching_experience_level(experience_years))
+        scores += (self.experience_codes == level) * EXPERIENCE_WEIGHT
+
+        if location and self.locations:
+            matches = np.fromiter(
+                (location_matches(location, job_location) for job_location in self.locations),
+                dtype=bool, count=len(self.locations),
+            )
+            scores += matches[self.location_ids] * LOCATION_WEIGHT
+
+        return scores.astype(np.int32, copy=False)
+
+    def score_profile(self, profile):
+        """Score a UserProfile against every job"""
+        return self.score(
+            profile.skill_set.values_list('pk', flat=True),
+            profile.experience_years,
+            profile.location,
+        )
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return this process's engine, brought up to date with the catalog
+
+    Logged job changes are patched in; the engine is only rebuilt when
+    the whole catalog changed, the log has a gap, or it is older than
+    RECOMMENDATION_ENGINE_TTL.
+    """
+    global _engine
+    position = catalog_position()
+    ttl = getattr(settings, 'RECOMMENDATION_ENGINE_TTL', 300)
+
+    engine = _engine
+    if engine is not None and engine.position == position and time.monotonic() - engine.built_at < ttl:
+        return engine
+
+    with _engine_lock:
+        engine = _engine
+        if engine is None or time.monotonic() - engine.built_at >= ttl:
+            changed = None
+        elif engine.position[0] != position[0] or engine.position[1] < position[1]:
+            changed = catalog_changes(engine.position, position)
+        else:
+            # Another thread caught up while this one waited
+            return engine
+        if changed is None:
+            engine = ScoringEngine.build()
+            engine.built_at = time.monotonic()
+        else:
+            built_at = engine.built_at
+            engine = engine.patched(changed)
+            engine.built_at = built_at
+        engine.position = position
+        _engine = engine
+    return engine
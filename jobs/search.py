@@ -0,0 +1,215 @@
+"""
+Full-text job search
+Picks a search backend for the database in use: FTS5 on SQLite, a
+tsvector column with a GIN index on PostgreSQL, and plain icontains
+matching anywhere else.
+"""
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+
+SEARCH_FIELDS = ('title', 'description', 'company_name', 'skills_required')
+
+SQLITE_FTS_TABLE = 'jobs_job_fts'
+# Shorter search words only match whole words
+MIN_PREFIX_LENGTH = 3
+POSTGRES_SEARCH_COLUMN = 'search_vector'
+
+
+class LikeSearchBackend:
+    """Substring matching over the searchable fields, unranked"""
+
+    def search(self, queryset, text):
+        query = Q()
+        for field in SEARCH_FIELDS:
+            query |= Q(**{f'{field}__icontains': text})
+        return queryset.filter(query).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteSearchBackend:
+    """FTS5 external-content table kept in sync with jobs_job by triggers"""
+
+    def match_expression(self, text):
+        """Quote each word, so user input can't inject FTS syntax, and prefix-match the longer ones
+
+        A short fragment such as the "c" of "C++" would prefix-match
+        nearly every row, so it has to match a whole word.
+        """
+        words = re.findall(r'\w+', text)
+        return ' '.join('"%s"*' % word if len(word) >= MIN_PREFIX_LENGTH else '"%s"' % word for word in words)
+
+    def search(self, queryset, text):
+        match = self.match_expression(text)
+        if not match:
+            return LikeSearchBackend().search(queryset, text)
+        # Join the FTS table through JobSearchEntry so MATCH runs once for
+        # the whole query; a correlated rank subquery would re-run it for
+        # every matching row. bm25() is lower for better matches.
+        matches = RawSQL(f'"{SQLITE_FTS_TABLE}" MATCH %s', [match], output_field=BooleanField())
+        rank = RawSQL(f'-bm25("{SQLITE_FTS_TABLE}")', [], output_field=FloatField())
+        return queryset.filter(matches, search_entry__isnull=False).annotate(search_rank=rank)
+
+
+class PostgresSearchBackend:
+    """Generated tsvector column with a GIN index"""
+
+    def search(self, queryset, text):
+        table = queryset.model._meta.db_table
+        vector = f'"{table}"."{POSTGRES_SEARCH_COLUMN}"'
+        query = "websearch_to_tsquery('english', %s)"
+        matches = RawSQL(f'{vector} @@ {query}', [text], output_field=BooleanField())
+        rank = RawSQL(f'ts_rank({vector}, {query})', [text], output_field=FloatField())
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+
+def get_search_backend(using='default'):
+    """Return the configured search backend, or the one suited to the database"""
+    backend_path = getattr(settings, 'JOB_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite' and sqlite_fts_available(connection):
+        return SQLiteSearchBackend()
+    return LikeSearchBackend()
+
+
+def search_jobs(queryset, text):
+    """Filter a Job queryset to matches for `text`, best matches first"""
+    return (
+        get_search_backend(queryset.db).search(queryset, text)
+        .order_by('-search_rank', '-posted_date')
+    )
+
+
+def filter_jobs(queryset, form):
+    """Apply a valid JobSearchForm's filters to a Job queryset"""
+    search = form.cleaned_data.get('search')
+    location = form.cleaned_data.get('location')
+    job_type = form.cleaned_data.get('job_type')
+    experience_level = form.cleaned_data.get('experience_level')
+
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+
+    if job_type:
+        queryset = queryset.filter(job_type=job_type)
+
+    if experience_level:
+        queryset = queryset.filter(experience_level=experience_level)
+
+    if search:
+        queryset = search_jobs(queryset, search)
+
+    return queryset
+
+
+# Index maintenance
+
+SQLITE_FTS_COLUMNS = ', '.join(SEARCH_FIELDS)
+SQLITE_FTS_NEW = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+SQLITE_FTS_OLD = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+
+SQLITE_FTS_TRIGGERS = {
+    f'{SQLITE_FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON jobs_job BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, {SQLITE_FTS_COLUMNS}) VALUES (new.id, {SQLITE_FTS_NEW});
+        END""",
+    f'{SQLITE_FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON jobs_job BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {SQLITE_FTS_COLUMNS})
+            VALUES ('delete', old.id, {SQLITE_FTS_OLD});
+        END""",
+    f'{SQLITE_FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au
+        AFTER UPDATE OF {SQLITE_FTS_COLUMNS} ON jobs_job BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {SQLITE_FTS_COLUMNS})
+            VALUES ('delete', old.id, {SQLITE_FTS_OLD});
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, {SQLITE_FTS_COLUMNS}) VALUES (new.id, {SQLITE_FTS_NEW});
+        END""",
+}
+
+
+def sqlite_fts_installed(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+_fts_databases = set()  # names of the SQLite databases known to have the FTS table
+
+
+def sqlite_fts_available(connection):
+    """sqlite_fts_installed(), remembered per database once it is true"""
+    name = connection.settings_dict['NAME']
+    if name not in _fts_databases and sqlite_fts_installed(connection):
+        _fts_databases.add(name)
+    return name in _fts_databases
+
+
+def install_search_index(connection):
+    """Create or repair the full-text index for the connection's database
+
+    Safe to run repeatedly. On SQLite, migrations that rebuild jobs_job drop
+    its triggers, so missing triggers are recreated and the index rebuilt.
+    Without FTS5 support the SQLite index is skipped and searches fall back
+    to LikeSearchBackend.
+    """
+    if connection.vendor == 'sqlite':
+        try:
+            with transaction.atomic(using=connection.alias):
+                _install_sqlite_fts(connection)
+        except DatabaseError:
+            pass
+    elif connection.vendor == 'postgresql':
+        _install_postgres_tsvector(connection)
+
+
+def _install_sqlite_fts(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'jobs_job'")
+        existing = {row[0] for row in cursor.fetchall()}
+        if sqlite_fts_installed(connection) and existing.issuperset(SQLITE_FTS_TRIGGERS):
+            return
+
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5("
+            f"{SQLITE_FTS_COLUMNS}, content='jobs_job', content_rowid='id')"
+        )
+        for sql in SQLITE_FTS_TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _install_postgres_tsvector(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            ALTER TABLE jobs_job ADD COLUMN IF NOT EXISTS {POSTGRES_SEARCH_COLUMN} tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(skills_required, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(company_name, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS jobs_job_{POSTGRES_SEARCH_COLUMN}_gin '
+            f'ON jobs_job USING GIN ({POSTGRES_SEARCH_COLUMN})'
+        )
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'ALTER TABLE jobs_job DROP COLUMN IF EXISTS {POSTGRES_SEARCH_COLUMN}')
@@ -0,0 +1,93 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .matching import SCORED_FIELDS, bump_catalog_revision
+from .models import Job
+from .recommendations import invalidate_recommendations_for_skills, sync_job_skills
+from .search import install_search_index
+
+
+def is_recommendable(fields):
+    return fields is not None and fields['is_active'] and fields['is_verified']
+
+
+@receiver(pre_save, sender=Job)
+def remember_scored_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Capture the scored fields of a job as stored, before it is saved over them"""
+    instance._scored_before = None
+    if raw or instance.pk is None or (update_fields is not None and not set(update_fields) & set(SCORED_FIELDS)):
+        return
+    instance._scored_before = Job.objects.filter(pk=instance.pk).values(*SCORED_FIELDS).first()
+
+
+@receiver(post_save, sender=Job)
+def update_job_skills(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep a job's Skill links in sync, and recommendations when a listed job changes
+
+    Engines only re-read the job, and only when it is listed before or
+    after the save and a field recommendations score changed.
+    """
+    if raw:
+        return
+    skill_ids = sync_job_skills(instance)
+    before = getattr(instance, '_scored_before', None)
+    after = {field: getattr(instance, field) for field in SCORED_FIELDS}
+    if before is None and update_fields is not None:
+        # None of the scored fields were saved
+        return
+    if not (is_recommendable(before) or is_recommendable(after)) or before == after:
+        return
+    job_id = instance.pk
+    transaction.on_commit(lambda: bump_catalog_revision([job_id]))
+    invalidate_recommendations_for_skills(skill_ids)
+
+
+@receiver(post_save, sender=Job)
+def update_similar_jobs(sender, instance, created=False, raw=False, **kwargs):
+    """Refresh a job's similar jobs once the save is committed
+
+    Only when a listed job is posted, or a job listed before or after the
+    save changed its text or whether it is listed; other edits leave every
+    list as it was.
+    """
+    if raw:
+        return
+    from .content import TEXT_FIELDS
+    from .similar import refresh_similar_jobs
+
+    fields = ('is_active', 'is_verified', *TEXT_FIELDS)
+    before = getattr(instance, '_scored_before', None)
+    after = {field: getattr(instance, field) for field in fields}
+    if created:
+        changed = is_recommendable(after)
+    else:
+        changed = (before is not None and (is_recommendable(before) or is_recommendable(after))
+                   and any(before[field] != after[field] for field in fields))
+    if changed:
+        transaction.on_commit(lambda: refresh_similar_jobs(instance))
+
+
+@receiver(pre_delete, sender=Job)
+def remember_job_skills(sender, instance, **kwargs):
+    """Capture a job's skills before its links are cascaded away"""
+    instance._deleted_skill_ids = list(instance.skills.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Job)
+def remove_job(sender, instance, **kwargs):
+    """Drop a deleted job from the scoring engines and cached recommendations"""
+    if not (instance.is_active and instance.is_verified):
+        return
+    job_id = instance.pk
+    transaction.on_commit(lambda: bump_catalog_revision([job_id]))
+    invalidate_recommendations_for_skills(getattr(instance, '_deleted_skill_ids', []))
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    """Recreate full-text triggers that a jobs_job table rebuild dropped"""
+    if sender.name != 'jobs':
+        return
+    connection = connections[using]
+    if Job._meta.db_table in connection.introspection.table_names():
+        install_search_index(connection)
@@ -0,0 +1,170 @@
+"""
+Similar jobs
+Each recommendable job keeps its SIMILAR_JOBS_LIMIT nearest neighbours by
+cosine similarity of the content index's TF-IDF rows in the SimilarJob
+table, so job_detail reads them with one indexed query.
+
+`manage.py build_similar_jobs` computes every list with blocked sparse
+products across worker processes. Saving a job recomputes its own list
+and offers it to its neighbours' lists. Both leave out terms found in
+more than about half the jobs: they add nearly the same to every pair
+and would make the products dense.
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Job, SimilarJob
+
+
+# Terms with a lower idf occur in more than half the jobs
+COMMON_TERM_IDF = 1 + math.log(2)
+# Dense similarities held at once per block of jobs (64 MB of float32)
+BLOCK_ENTRIES = 2 ** 24
+# Most lists already holding a saved job that the save rewrites, those it ranks highest in
+REFRESHED_LISTS = 100
+
+
+def similar_jobs_limit():
+    return getattr(settings, 'SIMILAR_JOBS_LIMIT', 10)
+
+
+def similar_jobs(job, limit):
+    """A job's similar jobs that are still listed, most similar first"""
+    links = (
+        SimilarJob.objects
+        .filter(job=job, similar__is_active=True, similar__is_verified=True)
+        .select_related('similar')
+        .only('rank', 'similar__title', 'similar__company_name', 'similar__location', 'similar__is_remote')
+        .order_by('rank')[:limit]
+    )
+    return [link.similar for link in links]
+
+
+def similarity_matrix(index, job_ids):
+    """(ids of the jobs found in the index, CSR of their latest rows without common terms)"""
+    import numpy as np
+    from scipy import sparse
+
+    from .content import N_FEATURES
+
+    rows = index.latest_rows(job_ids)
+    found = rows >= 0
+    if not index.blocks:
+        return job_ids[found], sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+    matrix = sparse.vstack([block for _, block in index.blocks], format='csr')[rows[found]]
+    matrix.data[index.idf[matrix.indices] < COMMON_TERM_IDF] = 0
+    matrix.eliminate_zeros()
+    return job_ids[found], matrix
+
+
+def top_neighbours(similarities, limit):
+    """Columns and scores of the `limit` highest positive similarities in each row, best first
+
+    Columns are -1 where a row has fewer positive similarities.
+    """
+    import numpy as np
+
+    k = min(limit, similarities.shape[1])
+    columns = np.argpartition(-similarities, k - 1, axis=1)[:, :k] if k else (
+        np.zeros((len(similarities), 0), dtype=np.int64))
+    scores = np.take_along_axis(similarities, columns, axis=1)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    columns = np.take_along_axis(columns, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    columns[scores <= 0] = -1
+    return columns, scores
+
+
+def neighbour_lists(matrix, columns, job_ids, start, stop, limit):
+    """{job id: [(similar job id, score)], best first} for rows start..stop of `matrix`
+
+    `columns` is the matrix as CSC. Each block of rows is densified over
+    just the terms it uses and multiplied with those columns, so the dense
+    similarities stay within BLOCK_ENTRIES.
+    """
+    import numpy as np
+
+    lists = {}
+    block = max(1, BLOCK_ENTRIES // max(1, matrix.shape[0]))
+    for first in range(start, stop, block):
+        last = min(first + block, stop)
+        rows = matrix[first:last]
+        terms = np.unique(rows.indices)
+        similarities = (columns[:, terms] @ rows[:, terms].T.toarray()).T
+        similarities[np.arange(last - first), np.arange(first, last)] = 0
+        neighbours, scores = top_neighbours(similarities, limit)
+        for job_id, row_neighbours, row_scores in zip(job_ids[first:last].tolist(), neighbours, scores):
+            lists[job_id] = [(int(job_ids[column]), float(score))
+                             for column, score in zip(row_neighbours, row_scores) if column >= 0]
+    return lists
+
+
+def replace_similar_jobs(lists):
+    """Replace the similar jobs of every job in `lists`; returns the rows written"""
+    links = [
+        SimilarJob(job_id=job_id, similar_id=similar_id, rank=rank, score=score)
+        for job_id, neighbours in lists.items()
+        for rank, (similar_id, score) in enumerate(neighbours, 1)
+    ]
+    with transaction.atomic():
+        SimilarJob.objects.filter(job_id__in=list(lists)).delete()
+        SimilarJob.objects.bulk_create(links, batch_size=5000)
+    return len(links)
+
+
+def refresh_similar_jobs(job):
+    """Recompute a saved job's similar jobs and offer it to its neighbours' lists
+
+    Only the job's new neighbours and up to REFRESHED_LISTS of the lists
+    it was already in are updated; other lists, and lists it would now
+    enter further down, wait for the next build_similar_jobs. Does
+    nothing before a content index is built.
+    """
+    import numpy as np
+
+    from .content import get_content_index, job_text
+
+    if not (job.is_active and job.is_verified):
+        SimilarJob.objects.filter(Q(job=job) | Q(similar=job)).delete()
+        return
+    index = get_content_index()
+    if index is None:
+        return
+
+    limit = similar_jobs_limit()
+    similarities = index.similarities(job_text(job), min_idf=COMMON_TERM_IDF)
+    similarities[index.superseded() | (index.job_ids == job.pk)] = 0
+    # The index keeps rows of jobs unlisted since it was built, so look at a few spares
+    columns, _ = top_neighbours(similarities[np.newaxis], limit * 3)
+    columns = columns[0][columns[0] >= 0]
+    listed = set(
+        Job.objects.filter(pk__in=index.job_ids[columns].tolist(), is_active=True, is_verified=True)
+        .values_list('pk', flat=True)
+    )
+    neighbours = [(int(index.job_ids[column]), float(similarities[column]))
+                  for column in columns if index.job_ids[column] in listed][:limit]
+
+    scores = dict(neighbours)
+    holding = set(
+        SimilarJob.objects.filter(similar=job).order_by('rank').values_list('job_id', flat=True)[:REFRESHED_LISTS]
+    ) - set(scores)
+    holding_ids = np.array(sorted(holding), dtype=np.int64)
+    for job_id, row in zip(holding_ids.tolist(), index.latest_rows(holding_ids).tolist()):
+        scores[job_id] = float(similarities[row]) if row >= 0 else 0.0
+
+    lists = {job_id: [] for job_id in scores}
+    for job_id, similar_id, score in (
+        SimilarJob.objects.filter(job_id__in=list(scores)).exclude(similar=job)
+        .order_by('job_id', 'rank').values_list('job_id', 'similar_id', 'score')
+    ):
+        lists[job_id].append((similar_id, score))
+    for job_id, entries in lists.items():
+        if scores[job_id] > 0:
+            entries.append((job.pk, scores[job_id]))
+            entries.sort(key=lambda entry: -entry[1])
+            del entries[limit:]
+    lists[job.pk] = neighbours
+    replace_similar_jobs(lists)
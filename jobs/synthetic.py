@@ -0,0 +1,257 @@
+"""
+Synthetic data at scale
+Generates recruiters, job seekers with profiles, jobs and applications
+with bulk_create in batches, for benchmarks and load tests. Skill
+popularity follows a Zipf-like curve, so a few skills appear on many
+jobs and most on few, as on real job boards. bulk_create skips the
+post_save signals, so Skill links are written directly here.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from applications.models import Application
+from users.models import UserProfile
+
+from .matching import bump_candidate_pool_revision, bump_catalog_revision
+from .models import Job, JobSkill, Skill
+from .recommendations import invalidate_all_recommendations
+
+
+User = get_user_model()
+
+SKILLS = [
+    'Python', 'JavaScript', 'SQL', 'Java', 'Communication', 'Excel', 'React', 'AWS', 'Git', 'Docker',
+    'Django', 'Node.js', 'TypeScript', 'Project Management', 'C#', 'Linux', 'HTML', 'CSS', 'Kubernetes',
+    'Azure', 'Agile', 'PostgreSQL', 'Machine Learning', 'Data Analysis', 'Go', 'C++', 'REST APIs',
+    'Spring', 'Angular', 'Vue.js', 'MongoDB', 'GCP', 'Terraform', 'Flask', 'Pandas', 'Tableau',
+    'Power BI', 'Salesforce', 'SEO', 'Marketing', 'Sales', 'Customer Service', 'Accounting', 'PHP',
+    'Ruby', 'Rails', 'Kotlin', 'Swift', 'iOS', 'Android', 'Figma', 'UX Design', 'Photoshop', 'Scrum',
+    'Jira', 'Redis', 'Kafka', 'Spark', 'Hadoop', 'Airflow', 'dbt', 'Snowflake', 'TensorFlow',
+    'PyTorch', 'NLP', 'Computer Vision', 'Statistics', 'R', 'MATLAB', 'Scala', 'Rust', 'Elixir',
+    'GraphQL', 'gRPC', 'Microservices', 'CI/CD', 'Jenkins', 'GitHub Actions', 'Ansible', 'Networking',
+    'Security', 'Penetration Testing', 'SOC 2', 'Copywriting', 'Content Strategy', 'Recruiting',
+    'Payroll', 'Bookkeeping', 'Negotiation', 'Leadership', 'Public Speaking', 'Excel VBA', 'SAP',
+    'Oracle', 'Embedded C', 'Verilog', 'AutoCAD', 'SolidWorks', 'Six Sigma', 'Logistics', 'Procurement',
+]
+
+ROLES = [
+    'Software Engineer', 'Backend Developer', 'Frontend Developer', 'Full Stack Developer',
+    'Data Scientist', 'Data Analyst', 'Data Engineer', 'DevOps Engineer', 'Site Reliability Engineer',
+    'Mobile Developer', 'QA Engineer', 'Product Manager', 'Project Manager', 'UX Designer',
+    'Marketing Specialist', 'Sales Representative', 'Customer Support Agent', 'Accountant',
+    'Security Analyst', 'Machine Learning Engineer', 'Business Analyst', 'Recruiter',
+]
+
+LOCATIONS = [
+    ('Remote', 20), ('New York', 10), ('San Francisco', 8), ('London', 8), ('Berlin', 6),
+    ('Bangalore', 8), ('Toronto', 5), ('Austin', 4), ('Sydney', 3), ('Paris', 3), ('Singapore', 3),
+    ('Chicago', 4), ('Seattle', 5), ('Hyderabad', 5), ('Amsterdam', 3), ('Dublin', 2),
+]
+
+EXPERIENCE_LEVELS = [('Entry', 30), ('Mid', 40), ('Senior', 25), ('Executive', 5)]
+JOB_TYPES = [('Full-time', 70), ('Part-time', 8), ('Contract', 12), ('Internship', 6), ('Remote', 4)]
+COMPANY_WORDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay',
+                 'Soylent', 'Tyrell', 'Cyberdyne', 'Wonka', 'Aperture', 'Black Mesa', 'Massive Dynamic']
+COMPANY_SUFFIXES = ['Labs', 'Systems', 'Corp', 'Technologies', 'Group', 'Analytics', 'Solutions']
+
+DAYS_OF_HISTORY = 180
+
+
+class SyntheticData:
+    """Generates and bulk inserts a synthetic job board"""
+
+    def __init__(self, seed=42, batch_size=5000, password='password', verified_ratio=0.9, progress=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = make_password(password)
+        self.verified_ratio = verified_ratio
+        self.progress = progress or (lambda message: None)
+        self.now = timezone.now()
+        self.skill_weights = [1 / rank ** 1.1 for rank in range(1, len(SKILLS) + 1)]
+        self.skill_ids = dict(Skill.objects.for_names(SKILLS).values_list('name', 'pk'))
+        self.location_names, self.location_weights = zip(*LOCATIONS)
+        self.level_names, self.level_weights = zip(*EXPERIENCE_LEVELS)
+        self.type_names, self.type_weights = zip(*JOB_TYPES)
+
+    def sample_skills(self, low, high):
+        """Distinct skills, popular ones more often"""
+        count = self.random.randint(low, high)
+        chosen = []
+        while len(chosen) < count:
+            skill = self.random.choices(SKILLS, self.skill_weights)[0]
+            if skill not in chosen:
+                chosen.append(skill)
+        return chosen
+
+    def past(self, days=DAYS_OF_HISTORY):
+        return self.now - timedelta(seconds=self.random.randrange(days * 24 * 60 * 60))
+
+    def batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield range(start, min(start + self.batch_size, count))
+
+    def _insert(self, model, objects, **kwargs):
+        """bulk_create one batch and return the new primary keys"""
+        before = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        created = model.objects.bulk_create(objects, **kwargs)
+        if created and created[0].pk is None:
+            # Backends that can't return ids from a bulk insert
+            return list(model.objects.filter(pk__gt=before).order_by('pk').values_list('pk', flat=True))
+        return [obj.pk for obj in created]
+
+    def _backdate(self, model, objects, ids, field, dates):
+        """Write the intended dates over an auto_now_add field that bulk_create set to now"""
+        for obj, pk, date in zip(objects, ids, dates):
+            obj.pk = pk
+            setattr(obj, field, date)
+        model.objects.bulk_update(objects, [field], batch_size=1000)
+
+    def create_users(self, count, kind):
+        """Create `count` users of kind 'hr' or 'seeker' and return their ids"""
+        suffix = (User.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        ids = []
+        for batch in self.batches(count):
+            users = [
+                User(username=f'synthetic-{kind}-{suffix + i}', password=self.password,
+                     email=f'synthetic-{kind}-{suffix + i}@example.com',
+                     is_hr=kind == 'hr', is_job_seeker=kind != 'hr')
+                for i in batch
+            ]
+            with transaction.atomic():
+                ids.extend(self._insert(User, users))
+            self.progress(f'{len(ids)}/{count} {kind} users')
+        return ids
+
+    def create_profiles(self, user_ids):
+        """Create a job seeker profile, with linked skills, for each user"""
+        through = UserProfile.skill_set.through
+        for start in range(0, len(user_ids), self.batch_size):
+            batch = user_ids[start:start + self.batch_size]
+            profiles, skills = [], []
+            for user_id in batch:
+                names = self.sample_skills(2, 10)
+                skills.append(names)
+                created = self.past(DAYS_OF_HISTORY * 2)
+                profiles.append(UserProfile(
+                    user_id=user_id, full_name=f'Seeker {user_id}', email=f'seeker{user_id}@example.com',
+                    skills=', '.join(names), experience_years=min(int(self.random.expovariate(1 / 5)), 40),
+                    location=self.random.choices(self.location_names, self.location_weights)[0],
+                    created_at=created,
+                ))
+            dates = [profile.created_at for profile in profiles]
+            with transaction.atomic():
+                profile_ids = self._insert(UserProfile, profiles)
+                self._backdate(UserProfile, profiles, profile_ids, 'created_at', dates)
+                through.objects.bulk_create([
+                    through(userprofile_id=profile_id, skill_id=self.skill_ids[name])
+                    for profile_id, names in zip(profile_ids, skills) for name in names
+                ])
+            self.progress(f'{min(start + self.batch_size, len(user_ids))}/{len(user_ids)} profiles')
+
+    def create_jobs(self, count, poster_ids):
+        """Create `count` jobs spread over the last months and return their ids"""
+        ids = []
+        for batch in self.batches(count):
+            jobs, skills = [], []
+            for _ in batch:
+                names = self.sample_skills(1, 8)
+                skills.append(names)
+                role = self.random.choice(ROLES)
+                level = self.random.choices(self.level_names, self.level_weights)[0]
+                company = f'{self.random.choice(COMPANY_WORDS)} {self.random.choice(COMPANY_SUFFIXES)}'
+                years = {'Entry': 0, 'Mid': 3, 'Senior': 6, 'Executive': 10}[level] + self.random.randint(0, 2)
+                salary = self.random.randrange(30, 250) * 1000
+                posted = self.past()
+                verified = self.random.random() < self.verified_ratio
+                location = self.random.choices(self.location_names, self.location_weights)[0]
+                jobs.append(Job(
+                    posted_by_id=self.random.choice(poster_ids),
+                    title=f'{level} {role}' if level != 'Mid' else role,
+                    company_name=company,
+                    description=(
+                        f'{company} is hiring a {role} to join a growing team. You will work with '
+                        f'{", ".join(names[:3])} and collaborate with product, design and engineering. '
+                        f'We offer a competitive salary and benefits package.'
+                    ),
+                    requirements=f'{years}+ years of experience. Knowledge of {", ".join(names)}.',
+                    location=location,
+                    salary_min=salary,
+                    salary_max=salary + self.random.randrange(5, 60) * 1000,
+                    job_type=self.random.choices(self.type_names, self.type_weights)[0],
+                    experience_level=level,
+                    skills_required=', '.join(names),
+                    is_remote=location == 'Remote',
+                    is_verified=verified,
+                    ml_confidence=round(self.random.uniform(0.55, 0.99), 2),
+                    verification_status='verified' if verified else 'flagged',
+                    posted_date=posted,
+                    is_active=self.random.random() < 0.92,
+                ))
+            dates = [job.posted_date for job in jobs]
+            with transaction.atomic():
+                job_ids = self._insert(Job, jobs)
+                self._backdate(Job, jobs, job_ids, 'posted_date', dates)
+                JobSkill.objects.bulk_create([
+                    JobSkill(job_id=job_id, skill_id=self.skill_ids[name])
+                    for job_id, names in zip(job_ids, skills) for name in names
+                ])
+            ids.extend(job_ids)
+            self.progress(f'{len(ids)}/{count} jobs')
+        return ids
+
+    def create_applications(self, count, seeker_ids, job_ids):
+        """Create up to `count` applications from random seekers to random jobs"""
+        statuses = [status for status, _ in Application.STATUS_CHOICES]
+        created = 0
+        for batch in self.batches(count):
+            pairs = {(self.random.choice(seeker_ids), self.random.choice(job_ids)) for _ in batch}
+            # Leave out seekers who already applied, so every row inserted is new
+            pairs -= set(
+                Application.objects.filter(user_id__in={user_id for user_id, _ in pairs},
+                                           job_id__in={job_id for _, job_id in pairs})
+                .values_list('user_id', 'job_id')
+            )
+            applications = [
+                Application(user_id=user_id, job_id=job_id, cover_letter='I would love to join your team.',
+                            applied_date=self.past(30), status=self.random.choice(statuses))
+                for user_id, job_id in sorted(pairs)
+            ]
+            dates = [application.applied_date for application in applications]
+            with transaction.atomic():
+                application_ids = self._insert(Application, applications)
+                self._backdate(Application, applications, application_ids, 'applied_date', dates)
+            created += len(applications)
+            self.progress(f'{created}/{count} applications')
+
+    def finish(self):
+        """Make scoring engines and cached recommendations see the new rows"""
+        bump_catalog_revision()
+        bump_candidate_pool_revision()
+        invalidate_all_recommendations()
+
+
+def seed(jobs=0, seekers=0, recruiters=0, applications=0, **options):
+    """Insert a synthetic job board; returns the SyntheticData used"""
+    data = SyntheticData(**options)
+    recruiter_ids = data.create_users(recruiters, 'hr') if recruiters else []
+    if jobs and not recruiter_ids:
+        recruiter_ids = list(User.objects.filter(is_hr=True).values_list('pk', flat=True)[:1000])
+        if not recruiter_ids:
+            recruiter_ids = data.create_users(1, 'hr')
+    seeker_ids = data.create_users(seekers, 'seeker') if seekers else []
+    if seeker_ids:
+        data.create_profiles(seeker_ids)
+    job_ids = data.create_jobs(jobs, recruiter_ids) if jobs else []
+    if applications:
+        seeker_ids = seeker_ids or list(UserProfile.objects.values_list('user_id', flat=True)[:100000])
+        job_ids = job_ids or list(Job.objects.values_list('pk', flat=True)[:100000])
+        if seeker_ids and job_ids:
+            data.create_applications(applications, seeker_ids, job_ids)
+    data.finish()
+    return data
@@ -0,0 +1,523 @@
+import re
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.models import UserProfile
+
+from .candidates import CandidatePool, get_candidate_pool
+from .content import ContentIndex
+from .duplicates import Fingerprint
+from .management.commands.explain_hot_queries import FULL_SCAN_PATTERNS, hot_queries
+from .matching import (
+    bump_candidate_pool_revision, bump_catalog_revision, candidate_pool_position, catalog_position, score_job,
+)
+from .ml_model import FakeJobDetector
+from .models import Job
+from .recommendations import Recommendations, cache_key
+from .rule_features import extract_features
+from .scoring import ScoringEngine, get_engine
+from .search import SEARCH_FIELDS, SQLiteSearchBackend
+from .similar import replace_similar_jobs
+from .synthetic import SyntheticData
+from .verification import verify_job
+
+
+User = get_user_model()
+
+_scratch = tempfile.TemporaryDirectory()
+
+
+def reference_scores(jobs, profile):
+    return [
+        score_job(job, set(profile.get_skills_list()), profile.experience_years, profile.location.lower())
+        for job in jobs
+    ]
+
+
+# No content index or trained model is read from, or written into, the working tree
+@override_settings(
+    RECOMMENDATION_CONTENT_INDEX_PATH=Path(_scratch.name) / 'content_index.npz',
+    RECOMMENDATION_CF_REGISTRY_DIR=Path(_scratch.name) / 'cf_models',
+)
+class CatalogTestCase(TestCase):
+    """A synthetic job board of a recruiter, seekers and a few hundred jobs"""
+
+    jobs = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = SyntheticData(seed=0)
+        cls.recruiter = User.objects.get(pk=cls.data.create_users(1, 'hr')[0])
+        seeker_ids = cls.data.create_users(20, 'seeker')
+        cls.data.create_profiles(seeker_ids)
+        cls.job_ids = cls.data.create_jobs(cls.jobs, [cls.recruiter.pk])
+
+    def setUp(self):
+        # Start epochs, so job and profile changes are logged rather than rebuilding engines and pools
+        bump_catalog_revision()
+        bump_candidate_pool_revision()
+        # Profiles with and without a location, matching some jobs or none
+        self.profiles = list(UserProfile.objects.order_by('pk'))
+        self.profiles[0].location = ''
+        self.profiles[1].location = 'new york, NY'
+        self.profiles[2].skills = 'Python, Cobol'
+        for profile in self.profiles[:3]:
+            profile.save()
+
+    def listed_job(self):
+        return Job.objects.filter(is_active=True, is_verified=True).order_by('pk').first()
+
+    def unlisted_job(self):
+        return Job.objects.filter(is_active=True, is_verified=False).order_by('pk').first()
+
+
+class ScoringParityTests(CatalogTestCase):
+    """The vectorised engines must score exactly as matching.score_job"""
+
+    def assertEngineMatchesReference(self, engine):
+        jobs = Job.objects.in_bulk(engine.job_ids.tolist())
+        listed = Job.objects.filter(is_active=True, is_verified=True).order_by('-posted_date', '-id')
+        self.assertEqual(engine.job_ids.tolist(), list(listed.values_list('pk', flat=True)))
+        ordered = [jobs[job_id] for job_id in engine.job_ids.tolist()]
+        for profile in self.profiles:
+            with self.subTest(profile=profile.pk):
+                self.assertEqual(engine.score_profile(profile).tolist(), reference_scores(ordered, profile))
+
+    def test_engine_matches_reference(self):
+        self.assertEngineMatchesReference(ScoringEngine.build())
+
+    def assertPoolMatchesReference(self, pool):
+        profiles = UserProfile.objects.in_bulk(pool.user_ids.tolist(), field_name='user_id')
+        self.assertEqual(pool.user_ids.tolist(), sorted(UserProfile.objects.values_list('user_id', flat=True)))
+        seekers = [profiles[user_id] for user_id in pool.user_ids.tolist()]
+        for job in Job.objects.filter(pk__in=self.job_ids[:50]):
+            with self.subTest(job=job.pk):
+                expected = [score_job(job, set(profile.get_skills_list()), profile.experience_years,
+                                      profile.location.lower()) for profile in seekers]
+                self.assertEqual(pool.score_job(job).tolist(), expected)
+
+    def test_candidate_pool_matches_reference(self):
+        self.assertPoolMatchesReference(CandidatePool.build())
+
+    def test_get_candidate_pool_patches_logged_changes(self):
+        pool = get_candidate_pool()
+        with self.captureOnCommitCallbacks(execute=True):
+            edited = self.profiles[3]
+            edited.skills = 'Cobol, Python'
+            edited.location = 'Lisbon'
+            edited.experience_years = 9
+            edited.save()
+            self.profiles[4].delete()
+            seeker = User.objects.create_user('newcomer', password='x')
+            UserProfile.objects.create(user=seeker, full_name='New Comer', email='new@example.com',
+                                       skills='Fortran', location='Lisbon', experience_years=1)
+
+        patched = get_candidate_pool()
+        self.assertIsNot(patched, pool)
+        self.assertEqual(patched.built_at, pool.built_at)
+        self.assertEqual(patched.position, candidate_pool_position())
+        self.assertPoolMatchesReference(patched)
+
+    def test_patched_engine_matches_rebuild(self):
+        engine = ScoringEngine.build()
+        moved, closed = Job.objects.filter(is_active=True, is_verified=True).order_by('pk')[:2]
+        moved.location = 'Lisbon'
+        moved.skills_required = 'Cobol, Python'
+        moved.save()
+        closed.is_active = False
+        closed.save()
+        verified = self.unlisted_job()
+        verified.is_verified = True
+        verified.verification_status = 'verified'
+        verified.save()
+        posted = Job.objects.create(
+            posted_by=self.recruiter, title='Mainframe Developer', company_name='Initech',
+            description='Keep the batch jobs running.', requirements='Cobol.', location='Lisbon',
+            experience_level='Senior', skills_required='Cobol', is_verified=True,
+            verification_status='verified',
+        )
+
+        patched = engine.patched([moved.pk, closed.pk, verified.pk, posted.pk])
+        rebuilt = ScoringEngine.build()
+        np.testing.assert_array_equal(patched.job_ids, rebuilt.job_ids)
+        self.assertEngineMatchesReference(patched)
+
+    def test_get_engine_patches_logged_changes(self):
+        engine = get_engine()
+        job = self.listed_job()
+        with self.captureOnCommitCallbacks(execute=True):
+            job.location = 'Lisbon'
+            job.save()
+
+        patched = get_engine()
+        self.assertIsNot(patched, engine)
+        self.assertEqual(patched.built_at, engine.built_at)
+        self.assertEqual(patched.position, catalog_position())
+        self.assertEngineMatchesReference(patched)
+
+
+class CandidateTests(CatalogTestCase):
+
+    def test_seekers_who_have_not_applied_are_anonymous(self):
+        self.client.force_login(self.recruiter)
+        response = self.client.get(reverse('job_candidates', args=[self.job_ids[0]]), {'pool': 'all'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['candidates'])
+        for profile in self.profiles:
+            self.assertNotContains(response, profile.email)
+            self.assertNotContains(response, profile.full_name)
+
+class CatalogRevisionTests(CatalogTestCase):
+
+    def test_unscored_or_unlisted_changes_keep_position(self):
+        position = catalog_position()
+        with self.captureOnCommitCallbacks(execute=True):
+            listed = self.listed_job()
+            listed.salary_max += 1000
+            listed.save()
+            pending = self.unlisted_job()
+            pending.location = 'Lisbon'
+            pending.save()
+        self.assertEqual(catalog_position(), position)
+
+    def test_scored_change_to_listed_job_is_logged(self):
+        epoch, sequence = catalog_position()
+        with self.captureOnCommitCallbacks(execute=True):
+            job = self.listed_job()
+            job.experience_level = 'Executive' if job.experience_level != 'Executive' else 'Entry'
+            job.save()
+        self.assertEqual(catalog_position(), (epoch, sequence + 1))
+
+    def test_deleting_listed_job_is_logged(self):
+        epoch, sequence = catalog_position()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listed_job().delete()
+        self.assertEqual(catalog_position(), (epoch, sequence + 1))
+
+
+class RecommendationCacheTests(CatalogTestCase):
+
+    def cached(self, profile):
+        Recommendations(profile).count()
+        return lambda: Recommendations(profile)._is_current(cache.get(cache_key(profile.user_id)))
+
+    def test_job_edit_expires_only_lists_sharing_its_skills(self):
+        job = self.listed_job()
+        sharing = next(profile for profile in self.profiles
+                       if set(profile.get_skills_list()) & set(job.get_skills_list()))
+        user = User.objects.create_user('bookkeeper', password='x')
+        other = UserProfile.objects.create(user=user, full_name='Book Keeper', email='books@example.com',
+                                           skills='Bookkeeping', location='Nowhere')
+        self.assertNotIn('Bookkeeping', job.get_skills_list())
+        sharing_current, other_current = self.cached(sharing), self.cached(other)
+        self.assertTrue(sharing_current())
+
+        job.skills_required += ', Cobol'
+        job.save()
+        self.assertFalse(sharing_current())
+        self.assertTrue(other_current())
+
+    def test_job_edit_cost_does_not_grow_with_seekers(self):
+        job = self.listed_job()
+        with CaptureQueriesContext(connection) as few_seekers:
+            job.location = 'Lisbon'
+            job.save()
+        self.data.create_profiles(self.data.create_users(200, 'seeker'))
+        with self.assertNumQueries(len(few_seekers)):
+            job.location = 'Porto'
+            job.save()
+
+
+class SkillOverlapTests(CatalogTestCase):
+
+    def test_counts_shared_skills(self):
+        profile = self.profiles[2]
+        skills = set(profile.get_skills_list())
+        overlaps = Job.objects.with_skill_overlap(profile.skill_set.values_list('pk', flat=True))
+        expected = {job.pk: len(skills & set(job.get_skills_list())) for job in Job.objects.all()}
+        self.assertEqual(dict(overlaps.values_list('pk', 'skill_overlap')),
+                         {job_id: count for job_id, count in expected.items() if count})
+
+    def test_aggregation_uses_skill_index(self):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'No plan check for the {connection.vendor} backend')
+        plan = Job.objects.with_skill_overlap([1, 2]).explain()
+        self.assertEqual(pattern.findall(plan), [], plan)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'No plan check for the {connection.vendor} backend')
+        if connection.vendor == 'postgresql':
+            # Small tables would otherwise be sequentially scanned regardless of indexes
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, queryset in hot_queries().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertEqual(pattern.findall(plan), [], plan)
+
+
+class QueryCountTests(CatalogTestCase):
+    """Pages make the same number of queries however large the catalog grows"""
+
+    def assertQueriesIndependentOfCatalog(self, url, grow, user=None, warm=True):
+        if user is not None:
+            self.client.force_login(user)
+        if warm:
+            # Once-per-process lookups, such as the search backend's, are made outside the comparison
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        grow()
+        with self.assertNumQueries(len(small)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def more_jobs(self):
+        self.data.create_jobs(self.jobs, [self.recruiter.pk])
+        self.data.finish()
+
+    def test_home(self):
+        self.assertQueriesIndependentOfCatalog(reverse('home'), self.more_jobs)
+
+    def test_job_list(self):
+        self.assertQueriesIndependentOfCatalog(reverse('job_list'), self.more_jobs)
+
+    def test_job_list_search(self):
+        self.assertQueriesIndependentOfCatalog(f'{reverse("job_list")}?search=python&location=remote', self.more_jobs)
+
+    def test_job_detail_similar_jobs(self):
+        job_id, *others = self.job_ids[:12]
+        replace_similar_jobs({job_id: [(others[0], 0.9)]})
+        self.assertQueriesIndependentOfCatalog(
+            reverse('job_detail', args=[job_id]),
+            lambda: replace_similar_jobs({job_id: [(other, 0.5) for other in others]}),
+            user=User.objects.filter(profile__isnull=False).first(),
+        )
+
+    def test_my_jobs(self):
+        self.assertQueriesIndependentOfCatalog(reverse('my_jobs'), self.more_jobs, user=self.recruiter)
+
+    def test_recommendations(self):
+        url = reverse('job_recommendations')
+        self.client.force_login(self.profiles[3].user)
+        self.client.get(url)
+
+        def rerank(grow=lambda: None):
+            # Each measured request finds its cached list stale and ranks the catalog afresh,
+            # in a process that has already seen the new epoch
+            grow()
+            self.data.finish()
+            catalog_position()
+
+        rerank()
+        self.assertQueriesIndependentOfCatalog(url, lambda: rerank(self.more_jobs), warm=False)
+
+
+class SearchTests(CatalogTestCase):
+
+    def test_ranks_only_matches(self):
+        job = self.listed_job()
+        job.title = 'Mainframe Cobol Developer'
+        job.skills_required = 'Cobol'
+        job.save()
+        response = self.client.get(reverse('job_list'), {'search': 'cobol'})
+        self.assertTrue(response.context['ranked'])
+        self.assertEqual([found.pk for found in response.context['jobs']], [job.pk])
+
+    def test_short_words_match_whole_words(self):
+        self.assertEqual(SQLiteSearchBackend().match_expression('C++ dev ops'), '"C" "dev"* "ops"*')
+        response = self.client.get(reverse('job_list'), {'search': 'C#'})
+        found = list(response.context['jobs'])
+        self.assertTrue(found)
+        for job in found:
+            text = ' '.join(getattr(job, field) for field in SEARCH_FIELDS)
+            self.assertRegex(text, r'(?i)\bc\b')
+
+    def test_fts_table_is_looked_up_once(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        self.client.get(reverse('job_list'), {'search': 'python'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('job_list'), {'search': 'python'})
+        self.assertFalse([query for query in queries.captured_queries if 'sqlite_master' in query['sql']])
+
+    def test_ranked_pages_are_capped(self):
+        with mock.patch('jobs.views.MAX_SEARCH_PAGES', 2):
+            response = self.client.get(reverse('job_list'), {'search': 'hiring', 'page': 5})
+        page = response.context['page']
+        self.assertEqual(page.paginator.num_pages, 2)
+        self.assertEqual(page.number, 2)
+
+
+class DuplicateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = User.objects.create_user('recruiter', password='x', is_hr=True, is_job_seeker=False)
+
+    def post(self, location, recruiter=None, **fields):
+        """Save a posting the way job_post does"""
+        job = Job(
+            posted_by=recruiter or self.recruiter, title='Backend Developer', company_name='Globex',
+            description='Globex is hiring a backend developer to build and run our payment APIs in Python.',
+            requirements='Three years of Python and PostgreSQL experience.', location=location,
+            experience_level='Mid', skills_required='Python, PostgreSQL', **fields,
+        )
+        fingerprint = Fingerprint(job)
+        job.save()
+        fingerprint.save(job)
+        return job
+
+    def listed(self, **filters):
+        response = self.client.get(reverse('job_list'), filters)
+        return [job.pk for job in response.context['jobs']]
+
+    def test_repost_is_listed_once(self):
+        original = self.post('Berlin')
+        self.post('Berlin')
+        self.assertEqual(self.listed(), [original.pk])
+
+    def test_repost_at_another_location_is_listed(self):
+        original = self.post('Berlin')
+        elsewhere = self.post('London')
+        self.assertEqual(self.listed(location='London'), [elsewhere.pk])
+        self.assertEqual(sorted(self.listed()), [original.pk, elsewhere.pk])
+
+    def test_only_the_recruiters_own_repost_keeps_the_verdict(self):
+        self.post('Berlin', is_verified=True, ml_confidence=0.9, verification_status='verified')
+        repost = Job(posted_by=self.recruiter, title='Backend Developer', company_name='Globex',
+                     description='Globex is hiring a backend developer to build and run our payment APIs in Python.',
+                     requirements='Three years of Python and PostgreSQL experience.')
+        self.assertIsNotNone(Fingerprint(repost).scored_duplicate(repost))
+
+        impostor = User.objects.create_user('impostor', password='x', is_hr=True, is_job_seeker=False)
+        repost.posted_by = impostor
+        self.assertIsNone(Fingerprint(repost).scored_duplicate(repost))
+
+
+class ContentIndexTests(CatalogTestCase):
+
+    jobs = 30
+
+    def test_fold_in_catches_up_in_steps(self):
+        index = ContentIndex.build()
+        for job in Job.objects.filter(is_active=True).order_by('pk')[:5]:
+            job.title = f'Mainframe {job.title}'
+            job.save()
+        edited = list(Job.objects.filter(title__startswith='Mainframe').order_by('pk').values_list('pk', flat=True))
+
+        index = index.updated(limit=3)
+        self.assertFalse(index.caught_up)
+        self.assertEqual(sorted(index.blocks[1][0].tolist()), edited[:3])
+        index = index.updated(limit=3)
+        self.assertTrue(index.caught_up)
+        self.assertEqual(sorted(index.blocks[1][0].tolist()), edited)
+        self.assertEqual(index.updated(limit=3).blocks[1][0].tolist(), index.blocks[1][0].tolist())
+
+
+class SimilarJobRefreshTests(CatalogTestCase):
+
+    jobs = 30
+
+    def refreshed(self, job, **changes):
+        for field, value in changes.items():
+            setattr(job, field, value)
+        with mock.patch('jobs.similar.refresh_similar_jobs') as refresh, \
+                self.captureOnCommitCallbacks(execute=True):
+            job.save()
+        return refresh.call_count
+
+    def test_text_or_listing_changes_refresh(self):
+        self.assertEqual(self.refreshed(self.listed_job(), title='Mainframe Developer'), 1)
+        self.assertEqual(self.refreshed(self.listed_job(), is_active=False), 1)
+
+    def test_other_changes_do_not_refresh(self):
+        job = self.listed_job()
+        self.assertEqual(self.refreshed(job, salary_max=(job.salary_max or 0) + 1000), 0)
+        self.assertEqual(self.refreshed(self.unlisted_job(), title='Mainframe Developer'), 0)
+
+class RuleFeatureTests(SimpleTestCase):
+
+    def reference(self, text):
+        # The per-rule regexes the detector used to run
+        return {
+            'has_salary_info': bool(re.search(r'\$\d+|\d+\s*(k|thousand|million)', text)),
+            'has_experience_requirement': bool(re.search(r'\d+\+?\s*(year|yr)', text)),
+            'has_skills': bool(re.search(r'(skill|experience|knowledge|proficient)', text)),
+            'suspicious_words': len(re.findall(r'(urgent|guaranteed|easy money|work from home|no experience)', text)),
+            'has_contact_info': bool(re.search(r'(email|phone|contact|apply)', text)),
+            'text_length': len(text),
+            'has_company_info': True,
+        }
+
+    def test_matches_the_per_rule_regexes(self):
+        for text in ('urgent: no experience needed', 'urgenturgent work from homework from home',
+                     'phonexperience', '$5 years', '3+ yr', '10 k or 5thousand', ''):
+            with self.subTest(text=text):
+                self.assertEqual(extract_features(text, '', '', 'Globex'), self.reference(f'{text}   globex'))
+
+class DetectorTests(TestCase):
+
+    posting = ('Backend Developer', 'Build and run our payment APIs in Python.', 'Three years of Python.', 'Globex')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(JOB_MODEL_REGISTRY_DIR=directory.name):
+            # Publish the stand-in model, as train_detector would
+            self.trainer = FakeJobDetector()
+            self.trainer.load()
+            self.version = self.trainer.publish(self.trainer.model, self.trainer.vectorizer)
+            self.detector = FakeJobDetector()
+
+    def break_live_version(self):
+        path = self.detector.registry.path(self.version, 'forest.joblib')
+        Path(path).write_bytes(b'corrupt')
+
+    def test_serves_the_flattened_forest_without_the_estimator(self):
+        self.detector.load()
+        self.assertIsNone(self.detector.model)
+        self.assertIsInstance(self.detector.forest.value, np.memmap)
+        self.assertEqual(self.detector.predict(*self.posting), self.trainer.predict(*self.posting))
+        self.assertIsNotNone(self.detector.estimator())
+
+    def test_unloadable_model_leaves_job_pending(self):
+        self.break_live_version()
+        job = Job(title=self.posting[0], description=self.posting[1], requirements=self.posting[2],
+                  company_name=self.posting[3])
+        with mock.patch('jobs.verification.detector', self.detector):
+            verify_job(job)
+        self.assertEqual(job.verification_status, Job.VERIFICATION_PENDING)
+        self.assertFalse(job.is_verified)
+
+    def test_worker_keeps_jobs_pending_while_model_is_unloadable(self):
+        self.break_live_version()
+        recruiter = User.objects.create_user('recruiter', password='x', is_hr=True, is_job_seeker=False)
+        job = Job.objects.create(
+            posted_by=recruiter, title=self.posting[0], description=self.posting[1],
+            requirements=self.posting[2], company_name=self.posting[3], location='Berlin',
+            experience_level='Mid', verification_status=Job.VERIFICATION_PENDING,
+        )
+        with mock.patch('jobs.verification.detector', self.detector), \
+                mock.patch('jobs.ml_model.detector', self.detector):
+            call_command('verify_jobs_worker', '--once', '--interval', '0', stdout=StringIO(), stderr=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.verification_status, Job.VERIFICATION_PENDING)
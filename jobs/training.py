@@ -0,0 +1,180 @@
+"""
+Streaming training for the fake job detector
+Labelled postings are read in chunks, hashed into a fixed feature space
+with HashingVectorizer (which needs no fitted vocabulary) and fed to an
+SGDClassifier through partial_fit, so memory use depends on the chunk
+size rather than on the size of the corpus. A stable hash of each
+posting's text decides whether it is held out for evaluation.
+"""
+import csv
+import math
+import sys
+import time
+import zlib
+from itertools import islice
+
+from .models import Job
+
+
+# Model labels: 1 is a real posting, 0 a fake one
+REAL, FAKE = 1, 0
+
+
+def posting_text(title, description, requirements, company_name):
+    """The text the detector scores, as FakeJobDetector.predict builds it"""
+    return f"{title} {description} {requirements} {company_name}"
+
+
+class CSVPostings:
+    """Labelled postings from a CSV file with title, description, requirements and company_name columns
+
+    `label_column` holds 1/0 (or true/false); with label_meaning='fake' a
+    1 marks a fraudulent posting, as in the public EMSCAD dataset.
+    """
+
+    TEXT_COLUMNS = ('title', 'description', 'requirements', 'company_name')
+
+    def __init__(self, path, label_column='fraudulent', label_meaning='fake'):
+        self.path = path
+        self.label_column = label_column
+        self.label_meaning = label_meaning
+
+    def __iter__(self):
+        csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+        with open(self.path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            missing = {self.label_column, *self.TEXT_COLUMNS} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f'{self.path} is missing columns: {", ".join(sorted(missing))}')
+            for row in reader:
+                value = row[self.label_column].strip().lower()
+                if value not in ('0', '1', 'true', 'false'):
+                    continue
+                flagged = value in ('1', 'true')
+                label = FAKE if flagged == (self.label_meaning == 'fake') else REAL
+                yield posting_text(*(row[column] or '' for column in self.TEXT_COLUMNS)), label
+
+
+class JobPostings:
+    """Scored jobs from the database, labelled by is_verified
+
+    Correct wrong verdicts in the admin before training on them.
+    """
+
+    def __init__(self, chunk_size=2000):
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        jobs = (
+            Job.objects.exclude(verification_status=Job.VERIFICATION_PENDING)
+            .order_by('pk')
+            .values_list('title', 'description', 'requirements', 'company_name', 'is_verified')
+        )
+        for title, description, requirements, company_name, is_verified in jobs.iterator(chunk_size=self.chunk_size):
+            yield posting_text(title, description, requirements, company_name), REAL if is_verified else FAKE
+
+
+def is_held_out(text, holdout_percent):
+    return zlib.crc32(text.encode()) % 100 < holdout_percent
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Metrics:
+    """Running hold-out metrics, with 'fake' as the positive class"""
+
+    def __init__(self):
+        self.true_fake = self.false_fake = self.true_real = self.false_real = 0
+        self.log_loss_total = 0.0
+
+    def update(self, labels, probabilities):
+        """Add a chunk of true labels and predicted P(real)"""
+        for label, p_real in zip(labels, probabilities.tolist()):
+            predicted_fake = p_real < 0.5
+            if label == FAKE:
+                self.true_fake += predicted_fake
+                self.false_real += not predicted_fake
+            else:
+                self.false_fake += predicted_fake
+                self.true_real += not predicted_fake
+            p = min(max(p_real if label == REAL else 1.0 - p_real, 1e-15), 1.0)
+            self.log_loss_total -= math.log(p)
+
+    @property
+    def count(self):
+        return self.true_fake + self.false_fake + self.true_real + self.false_real
+
+    def report(self):
+        count = self.count
+        precision = self.true_fake / (self.true_fake + self.false_fake) if self.true_fake + self.false_fake else 0.0
+        recall = self.true_fake / (self.true_fake + self.false_real) if self.true_fake + self.false_real else 0.0
+        return {
+            'postings': count,
+            'accuracy': (self.true_fake + self.true_real) / count if count else 0.0,
+            'precision': precision,
+            'recall': recall,
+            'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            'log_loss': self.log_loss_total / count if count else 0.0,
+        }
+
+
+def build_estimators(n_features=2 ** 20, alpha=1e-5):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+
+    vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, stop_words='english',
+                                   ngram_range=(1, 2))
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=42)
+    return vectorizer, model
+
+
+def train(postings, chunk_size=10000, epochs=1, holdout_percent=10, n_features=2 ** 20, progress=None):
+    """Train on a re-iterable stream of (text, label) pairs
+
+    Returns (model, vectorizer, report). `progress` is called with a
+    message after every chunk.
+    """
+    vectorizer, model = build_estimators(n_features)
+    trained = 0
+    started = time.perf_counter()
+    for epoch in range(1, epochs + 1):
+        epoch_started = time.perf_counter()
+        epoch_rows = 0
+        for chunk in chunked(postings, chunk_size):
+            rows = [(text, label) for text, label in chunk if not is_held_out(text, holdout_percent)]
+            if not rows:
+                continue
+            texts, labels = zip(*rows)
+            model.partial_fit(vectorizer.transform(texts), labels, classes=[FAKE, REAL])
+            epoch_rows += len(rows)
+            if progress:
+                elapsed = time.perf_counter() - epoch_started
+                progress(f'Epoch {epoch}: {epoch_rows} postings, {epoch_rows / elapsed:.0f} postings/s')
+        if not epoch_rows:
+            raise ValueError('No training postings outside the hold-out set')
+        trained += epoch_rows
+
+    training_seconds = time.perf_counter() - started
+    real_column = list(model.classes_).index(REAL)
+    metrics = Metrics()
+    for chunk in chunked(postings, chunk_size):
+        rows = [(text, label) for text, label in chunk if is_held_out(text, holdout_percent)]
+        if rows:
+            texts, labels = zip(*rows)
+            metrics.update(labels, model.predict_proba(vectorizer.transform(texts))[:, real_column])
+
+    report = {
+        'trained_postings': trained,
+        'epochs': epochs,
+        'training_seconds': round(training_seconds, 3),
+        'postings_per_second': round(trained / training_seconds) if training_seconds else None,
+        'holdout': metrics.report(),
+    }
+    return model, vectorizer, report
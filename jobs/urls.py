@@ -6,10 +6,12 @@ urlpatterns = [
     path('jobs/', views.job_list, name='job_list'),
     path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
     path('jobs/post/', views.job_post, name='job_post'),
+    path('jobs/<int:pk>/candidates/', views.job_candidates, name='job_candidates'),
     path('jobs/<int:pk>/edit/', views.job_edit, name='job_edit'),
     path('jobs/<int:pk>/delete/', views.job_delete, name='job_delete'),
     path('recommendations/', views.job_recommendations, name='job_recommendations'),
     path('my-jobs/', views.my_jobs, name='my_jobs'),
+    path('performance/', views.performance_metrics, name='performance_metrics'),
 ]
 
 
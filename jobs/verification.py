@@ -0,0 +1,149 @@
+"""
+Job verification
+Runs the fake job detector over many jobs at once: the background worker
+drains the queue of pending jobs, and reverify_jobs re-scores the whole
+catalog after the model changes.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .matching import bump_catalog_revision, cache_is_shared
+from .ml_model import detector
+from .model_registry import RegistryError
+from .models import Job, JobSkill
+from .recommendations import invalidate_all_recommendations, invalidate_recommendations_for_skills
+
+
+VERIFICATION_FIELDS = ('title', 'description', 'requirements', 'company_name')
+
+
+def verification_is_async():
+    """Whether jobs are left to verify_jobs_worker
+
+    The worker's revision bumps only reach the web processes through a
+    shared cache, so with a per-process one jobs are verified in the
+    request instead.
+    """
+    return getattr(settings, 'JOB_VERIFICATION_ASYNC', True) and cache_is_shared()
+
+
+def apply_prediction(job, prediction):
+    job.is_verified = prediction['is_real']
+    job.ml_confidence = prediction['confidence']
+    job.verification_status = 'verified' if prediction['is_real'] else 'flagged'
+
+
+def verify_job(job):
+    """Score one unsaved job in the request, the way job_post used to
+
+    If the live model cannot be loaded the job gets the rule-based score
+    but stays pending, for the worker or reverify_jobs to score later.
+    """
+    posting = (job.title, job.description, job.requirements, job.company_name)
+    try:
+        prediction = detector.predict(*posting)
+    except RegistryError:
+        prediction = detector.predict_rule_based([posting])[0]
+        apply_prediction(job, prediction)
+        queue_verification(job)
+        return prediction
+    apply_prediction(job, prediction)
+    return prediction
+
+
+def copy_verification(job, source):
+    """Give a repost the verdict already reached for the posting it copies"""
+    job.is_verified = source.is_verified
+    job.ml_confidence = source.ml_confidence
+    job.verification_status = source.verification_status
+
+
+def queue_verification(job):
+    """Hold a job back from recommendations until the worker scores it"""
+    job.is_verified = False
+    job.verification_status = Job.VERIFICATION_PENDING
+
+
+def verify_jobs(jobs):
+    """Score jobs in one batch, setting the verification fields in place
+
+    Returns the jobs whose verdict, confidence or status changed.
+    """
+    predictions = detector.predict_batch(
+        (job.title, job.description, job.requirements, job.company_name) for job in jobs
+    )
+    changed = []
+    for job, prediction in zip(jobs, predictions):
+        before = (job.is_verified, job.ml_confidence, job.verification_status)
+        apply_prediction(job, prediction)
+        if (job.is_verified, job.ml_confidence, job.verification_status) != before:
+            changed.append(job)
+    return changed
+
+
+def save_verifications(jobs, batch_size=1000):
+    """Write verdicts back with one bulk UPDATE per batch
+
+    bulk_update skips the post_save signal, so callers must run
+    verification_finished() once they are done. updated_date is left
+    alone: a verdict does not change the posting.
+    """
+    Job.objects.bulk_update(jobs, ['is_verified', 'ml_confidence', 'verification_status'], batch_size=batch_size)
+
+
+def verification_finished(jobs=None):
+    """Make the scoring engines and recommendations pick up new verdicts
+
+    With `jobs`, the scoring engines only re-read those jobs, only
+    seekers sharing a skill with them are invalidated and their similar
+    jobs are refreshed; otherwise every engine is rebuilt, every
+    recommendation list is invalidated and similar jobs wait for
+    build_similar_jobs.
+    """
+    if jobs is None:
+        bump_catalog_revision()
+        invalidate_all_recommendations()
+    else:
+        from .content import TEXT_FIELDS
+        from .similar import refresh_similar_jobs
+
+        job_ids = [job.pk for job in jobs]
+        bump_catalog_revision(job_ids)
+        skill_ids = JobSkill.objects.filter(job__in=job_ids).values_list('skill_id', flat=True)
+        invalidate_recommendations_for_skills(set(skill_ids))
+        for job in Job.objects.filter(pk__in=job_ids).only('is_active', 'is_verified', *TEXT_FIELDS):
+            refresh_similar_jobs(job)
+
+
+def verify_pending_jobs(batch_size=100):
+    """Score the oldest pending jobs; returns how many were processed
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several workers can drain the queue side by side. Where it does not
+    (SQLite), a job edited while it was being scored could get a verdict
+    for its old text, so each verdict is only written if the job is still
+    pending and unchanged since it was read; an edited job stays pending
+    and is scored again on the next batch.
+    """
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(verification_status=Job.VERIFICATION_PENDING).order_by('pk')
+            .only('pk', 'is_verified', 'ml_confidence', 'verification_status', 'updated_date',
+                  *VERIFICATION_FIELDS)[:batch_size]
+        )
+        if not jobs:
+            return 0
+        verify_jobs(jobs)
+        saved = [
+            job for job in jobs
+            if Job.objects.filter(
+                pk=job.pk, verification_status=Job.VERIFICATION_PENDING, updated_date=job.updated_date,
+            ).update(is_verified=job.is_verified, ml_confidence=job.ml_confidence,
+                     verification_status=job.verification_status)
+        ]
+
+    verified = [job for job in saved if job.is_verified]
+    if verified:
+        verification_finished(verified)
+    return len(jobs)
@@ -1,78 +1,74 @@
+import os
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from .candidates import RankedApplicants, RankedSeekers
+from .duplicates import FINGERPRINT_FIELDS, GROUP_FIELDS, Fingerprint, without_duplicates
 from .models import Job
 from .forms import JobPostForm, JobSearchForm
+from .instrumentation import BUCKETS_MS, histograms, instrumentation_enabled
 from .ml_model import detector
+from .pagination import KeysetPaginator
+from .recommendations import Recommendations
+from .search import filter_jobs
+from .similar import similar_jobs
+from .verification import (
+    VERIFICATION_FIELDS, copy_verification, queue_verification, verification_is_async, verify_job,
+)
 from users.models import UserProfile
 
 
+JOBS_PER_PAGE = 20
+# Relevance-ranked search results are paged with OFFSET, so only this many pages are offered
+MAX_SEARCH_PAGES = 50
+RECOMMENDATIONS_PER_PAGE = 10
+CANDIDATES_PER_PAGE = 20
+SIMILAR_JOBS_SHOWN = 5
+
+
 def home(request):
     """Home page with job listings"""
-    jobs = Job.objects.filter(is_active=True).order_by('-posted_date')[:10]
+    jobs = Job.objects.filter(is_active=True).order_by('-posted_date')
     form = JobSearchForm(request.GET)
     
     if form.is_valid():
-        search = form.cleaned_data.get('search')
-        location = form.cleaned_data.get('location')
-        job_type = form.cleaned_data.get('job_type')
-        experience_level = form.cleaned_data.get('experience_level')
-        
-        if search:
-            jobs = jobs.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(company_name__icontains=search) |
-                Q(skills_required__icontains=search)
-            )
-        
-        if location:
-            jobs = jobs.filter(location__icontains=location)
-        
-        if job_type:
-            jobs = jobs.filter(job_type=job_type)
-        
-        if experience_level:
-            jobs = jobs.filter(experience_level=experience_level)
+        jobs = filter_jobs(jobs, form)
     
     context = {
-        'jobs': jobs,
+        'jobs': jobs[:10],
         'form': form,
     }
     return render(request, 'jobs/home.html', context)
 
 
 def job_list(request):
-    """List all active jobs"""
-    jobs = Job.objects.filter(is_active=True).order_by('-posted_date')
+    """List all active jobs, showing reposts of a listed job once"""
+    jobs = without_duplicates(Job.objects.filter(is_active=True)).order_by('-posted_date')
     form = JobSearchForm(request.GET)
+    ranked = False
     
     if form.is_valid():
-        search = form.cleaned_data.get('search')
-        location = form.cleaned_data.get('location')
-        job_type = form.cleaned_data.get('job_type')
-        experience_level = form.cleaned_data.get('experience_level')
-        
-        if search:
-            jobs = jobs.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(company_name__icontains=search) |
-                Q(skills_required__icontains=search)
-            )
-        
-        if location:
-            jobs = jobs.filter(location__icontains=location)
-        
-        if job_type:
-            jobs = jobs.filter(job_type=job_type)
-        
-        if experience_level:
-            jobs = jobs.filter(experience_level=experience_level)
+        jobs = filter_jobs(jobs, form)
+        ranked = bool(form.cleaned_data.get('search'))
+    
+    # Relevance-ranked search results are paged by number, up to
+    # MAX_SEARCH_PAGES; the full listing uses keyset pagination so deep
+    # pages stay cheap
+    if ranked:
+        jobs = jobs[:MAX_SEARCH_PAGES * JOBS_PER_PAGE]
+        page = Paginator(jobs, JOBS_PER_PAGE).get_page(request.GET.get('page'))
+    else:
+        page = KeysetPaginator(jobs, JOBS_PER_PAGE).page(request.GET.get('cursor'))
     
     context = {
-        'jobs': jobs,
+        'jobs': page.object_list,
+        'page': page,
+        'ranked': ranked,
         'form': form,
     }
     return render(request, 'jobs/job_list.html', context)
@@ -89,6 +85,7 @@ def job_detail(request, pk):
     context = {
         'job': job,
         'has_applied': has_applied,
+        'similar_jobs': similar_jobs(job, SIMILAR_JOBS_SHOWN),
     }
     return render(request, 'jobs/job_detail.html', context)
 
@@ -105,21 +102,32 @@ def job_post(request):
         if form.is_valid():
             job = form.save(commit=False)
             job.posted_by = request.user
+            fingerprint = Fingerprint(job)
             
-            # ML Prediction
-            prediction = detector.predict(
-                job.title,
-                job.description,
-                job.requirements,
-                job.company_name
-            )
+            # A repost keeps the verdict of the posting it copies
+            original = fingerprint.scored_duplicate(job)
+            if original is not None:
+                copy_verification(job, original)
+                job.save()
+                fingerprint.save(job)
+                messages.info(request, 'Job posted. It closely matches one of your company\'s earlier postings, so it keeps that posting\'s verification.')
+                return redirect('job_detail', pk=job.pk)
             
-            job.is_verified = prediction['is_real']
-            job.ml_confidence = prediction['confidence']
+            # ML Prediction, in the background worker unless verification is synchronous
+            if verification_is_async():
+                queue_verification(job)
+                job.save()
+                fingerprint.save(job)
+                messages.success(request, 'Job posted successfully! It will be listed as verified once our checks finish.')
+                return redirect('job_detail', pk=job.pk)
             
+            prediction = verify_job(job)
             job.save()
+            fingerprint.save(job)
             
-            if prediction['is_real']:
+            if job.verification_status == Job.VERIFICATION_PENDING:
+                messages.success(request, 'Job posted successfully! It will be listed as verified once our checks finish.')
+            elif prediction['is_real']:
                 messages.success(request, f'Job posted successfully! (Verified: {prediction["confidence"]*100:.1f}% confidence)')
             else:
                 messages.warning(request, f'Job posted but flagged as potentially fake. Please review. (Confidence: {prediction["confidence"]*100:.1f}%)')
@@ -144,46 +152,12 @@ def job_recommendations(request):
         messages.info(request, 'Please complete your profile to get job recommendations.')
         return redirect('user_profile_create')
     
-    user_skills = set(profile.get_skills_list())
-    user_experience = profile.experience_years
-    
-    # Get all active jobs
-    all_jobs = Job.objects.filter(is_active=True, is_verified=True)
-    
-    # Score jobs based on match
-    job_scores = []
-    for job in all_jobs:
-        score = 0
-        job_skills = set(job.get_skills_list())
-        
-        # Skill matching
-        if user_skills and job_skills:
-            common_skills = user_skills.intersection(job_skills)
-            score += len(common_skills) * 10
-        
-        # Experience matching
-        if job.experience_level == 'Entry' and user_experience <= 2:
-            score += 5
-        elif job.experience_level == 'Mid' and 2 < user_experience <= 5:
-            score += 5
-        elif job.experience_level == 'Senior' and user_experience > 5:
-            score += 5
-        
-        # Location matching (if user has location)
-        if profile.location and job.location:
-            if profile.location.lower() in job.location.lower() or job.location.lower() in profile.location.lower():
-                score += 3
-        
-        job_scores.append((job, score))
-    
-    # Sort by score and get top recommendations
-    job_scores.sort(key=lambda x: x[1], reverse=True)
-    # Get top 10 jobs with scores, normalize score to percentage (max score ~50)
-    max_score = max([score for _, score in job_scores], default=1)
-    recommended_jobs = [(job, min(int((score / max_score) * 100), 100)) for job, score in job_scores if score > 0][:10]
+    paginator = Paginator(Recommendations(profile), RECOMMENDATIONS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
-        'recommended_jobs': recommended_jobs,
+        'recommended_jobs': page_obj.object_list,
+        'page_obj': page_obj,
         'profile': profile,
     }
     return render(request, 'jobs/job_recommendations.html', context)
@@ -196,10 +170,36 @@ def my_jobs(request):
         messages.error(request, 'Only HR/Recruiters can view this page.')
         return redirect('home')
     
-    jobs = Job.objects.filter(posted_by=request.user).order_by('-posted_date')
+    jobs = (
+        Job.objects.filter(posted_by=request.user).order_by('-posted_date')
+        .annotate(application_count=Count('applications'))
+    )
     return render(request, 'jobs/my_jobs.html', {'jobs': jobs})
 
 
+@login_required
+def job_candidates(request, pk):
+    """Rank a job's applicants, or every job seeker, by fit"""
+    job = get_object_or_404(Job, pk=pk)
+    
+    if job.posted_by != request.user or not request.user.is_hr:
+        messages.error(request, 'You do not have permission to view candidates for this job.')
+        return redirect('home')
+    
+    # Applicants by default; ?pool=all ranks every seeker with a positive score
+    everyone = request.GET.get('pool') == 'all'
+    candidates = RankedSeekers(job) if everyone else RankedApplicants(job)
+    page_obj = Paginator(candidates, CANDIDATES_PER_PAGE).get_page(request.GET.get('page'))
+    
+    context = {
+        'job': job,
+        'candidates': page_obj.object_list,
+        'page_obj': page_obj,
+        'everyone': everyone,
+    }
+    return render(request, 'jobs/job_candidates.html', context)
+
+
 @login_required
 def job_edit(request, pk):
     """Edit a job posting"""
@@ -212,19 +212,23 @@ def job_edit(request, pk):
     if request.method == 'POST':
         form = JobPostForm(request.POST, instance=job)
         if form.is_valid():
-            job = form.save()
-            
-            # Re-run ML prediction
-            prediction = detector.predict(
-                job.title,
-                job.description,
-                job.requirements,
-                job.company_name
-            )
+            job = form.save(commit=False)
+            fingerprint = None
+            if any(field in form.changed_data for field in FINGERPRINT_FIELDS + GROUP_FIELDS):
+                fingerprint = Fingerprint(job)
             
-            job.is_verified = prediction['is_real']
-            job.ml_confidence = prediction['confidence']
+            # Re-run ML prediction only when the scored text changed, unless it now copies a scored posting
+            if any(field in form.changed_data for field in VERIFICATION_FIELDS):
+                original = fingerprint.scored_duplicate(job) if fingerprint else None
+                if original is not None:
+                    copy_verification(job, original)
+                elif verification_is_async():
+                    queue_verification(job)
+                else:
+                    verify_job(job)
             job.save()
+            if fingerprint:
+                fingerprint.save(job)
             
             messages.success(request, 'Job updated successfully!')
             return redirect('job_detail', pk=job.pk)
@@ -250,3 +254,18 @@ def job_delete(request, pk):
     
     return render(request, 'jobs/job_confirm_delete.html', {'job': job})
 
+
+
+@staff_member_required
+def performance_metrics(request):
+    """Request timing histograms recorded by this process, as JSON"""
+    if not instrumentation_enabled():
+        raise Http404('Performance instrumentation is disabled.')
+    
+    return JsonResponse({
+        'since': histograms.started,
+        'pid': os.getpid(),
+        'buckets_ms': BUCKETS_MS,
+        'views': histograms.snapshot(),
+        'prediction_cache': detector.cache_info()._asdict(),
+    })
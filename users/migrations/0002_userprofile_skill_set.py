@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:25
+
+from django.db import migrations, models
+
+
+def link_profile_skills(apps, schema_editor):
+    UserProfile = apps.get_model('users', 'UserProfile')
+    Skill = apps.get_model('jobs', 'Skill')
+    Link = UserProfile.skill_set.through
+    max_length = Skill._meta.get_field('name').max_length
+
+    profile_skills = {}
+    for profile_id, skills in UserProfile.objects.values_list('id', 'skills').iterator():
+        names = {skill.strip()[:max_length] for skill in (skills or '').split(',')}
+        profile_skills[profile_id] = {name for name in names if name}
+
+    names = set().union(*profile_skills.values())
+    Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True, batch_size=1000)
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+
+    Link.objects.bulk_create(
+        [Link(userprofile_id=profile_id, skill_id=skill_ids[name])
+         for profile_id, names in profile_skills.items() for name in names],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_skill_jobskill'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='profiles', to='jobs.skill'),
+        ),
+        migrations.RunPython(link_profile_skills, migrations.RunPython.noop),
+    ]
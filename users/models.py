@@ -19,6 +19,7 @@ class UserProfile(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     bio = models.TextField(blank=True)
     skills = models.TextField(help_text="Comma-separated list of skills")
+    skill_set = models.ManyToManyField('jobs.Skill', related_name='profiles', blank=True)
     experience_years = models.IntegerField(default=0)
     education = models.CharField(max_length=200, blank=True)
     location = models.CharField(max_length=200, blank=True)
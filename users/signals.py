@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from jobs.matching import bump_candidate_pool_revision
+from jobs.models import Skill
+from jobs.recommendations import invalidate_recommendations
+from .models import UserProfile
+
+
+@receiver(post_save, sender=UserProfile)
+def update_profile_skills(sender, instance, raw=False, **kwargs):
+    """Keep a profile's Skill links in sync when it is created or edited"""
+    if raw:
+        return
+    instance.skill_set.set(Skill.objects.for_names(instance.get_skills_list()))
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_candidate_pool_revision([user_id]))
+    invalidate_recommendations([user_id])
+
+
+@receiver(post_delete, sender=UserProfile)
+def remove_profile(sender, instance, **kwargs):
+    """Drop a deleted profile from the candidate pools and cached recommendations"""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_candidate_pool_revision([user_id]))
+    invalidate_recommendations([user_id])